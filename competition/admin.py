@@ -1,11 +1,20 @@
 from django.contrib import admin
-from .models import Task, Test, Solution, SolutionTestResult, Configuration
+from .models import Task, Test, Solution, SolutionTestResult, Configuration, JudgeQueueEntry, \
+    VerdictCacheEntry, ScoreboardEntry, ScoreboardTaskEntry, RankingSnapshot, VerdictEvent, \
+    ScoreboardCheckpoint
 
 
 admin.site.register(Task)
 admin.site.register(Test)
 admin.site.register(Solution)
 admin.site.register(SolutionTestResult)
+admin.site.register(JudgeQueueEntry)
+admin.site.register(VerdictCacheEntry)
+admin.site.register(ScoreboardEntry)
+admin.site.register(ScoreboardTaskEntry)
+admin.site.register(RankingSnapshot)
+admin.site.register(VerdictEvent)
+admin.site.register(ScoreboardCheckpoint)
 
 @admin.register(Configuration)
 class ConfigurationAdmin(admin.ModelAdmin):
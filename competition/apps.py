@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CompetitionConfig(AppConfig):
     name = 'competition'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,98 @@
+import codecs
+import io
+
+
+class OutputChecker:
+    # Porownuje wyjscie rozwiazania z oczekiwanym fragment po fragmencie, bez trzymania calego wyjscia w pamieci.
+    # Wynik jest taki sam jak przy porownaniu calych tekstow:
+    # poprawne - oczekiwane == wyjscie.rstrip(), blad prezentacji - zgodne po usunieciu wszystkich bialych znakow.
+    # Dla strip_expected_output=True biale znaki na koncu oczekiwanego wyjscia sa pomijane (pliki z danymi testowymi
+    # zwykle koncza sie znakiem nowej linii).
+
+    def __init__(self, open_expected_output, output_limit, strip_expected_output=False):
+        self.__exact_expected_output = open_expected_output()
+        self.__tokens_expected_output = open_expected_output()
+        self.__output_limit = output_limit
+        self.__strip_expected_output = strip_expected_output
+        self.__output_size = 0
+        # jak przy odczycie w trybie tekstowym - \r\n i \r na koncu linii sa zamieniane na \n
+        self.__decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(errors='replace'),
+                                                      translate=True)
+        self.__pending_whitespace = ''
+        self.__is_exact_match = True
+        self.__is_tokens_match = True
+        self.is_output_limit_exceeded = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.__exact_expected_output.close()
+        self.__tokens_expected_output.close()
+
+    def feed(self, chunk):
+        # zwraca False, gdy rozwiazanie trzeba przerwac
+        self.__output_size += len(chunk)
+        if self.__output_size > self.__output_limit:
+            self.is_output_limit_exceeded = True
+            return False
+        self.__compare(self.__decoder.decode(chunk))
+        return True
+
+    def is_output_correct(self):
+        self.__finish()
+        return self.__is_exact_match
+
+    def is_presentation_error(self):
+        self.__finish()
+        return self.__is_tokens_match
+
+    def __finish(self):
+        if self.__decoder is None:
+            return
+        self.__compare(self.__decoder.decode(b'', final=True))
+        self.__decoder = None
+        # biale znaki na koncu wyjscia rozwiazania sa pomijane (rstrip), wiec oczekiwane wyjscie musi sie tu konczyc
+        if self.__is_exact_match:
+            self.__is_exact_match = self.__is_expected_output_finished(self.__exact_expected_output)
+        if self.__is_tokens_match:
+            self.__is_tokens_match = self.__read_without_whitespace(self.__tokens_expected_output, 1) == ''
+
+    def __is_expected_output_finished(self, expected_output):
+        if not self.__strip_expected_output:
+            return expected_output.read(1) == ''
+        while True:
+            expected_text = expected_output.read(4096)
+            if not expected_text:
+                return True
+            if expected_text.strip():
+                return False
+
+    def __compare(self, text):
+        if not text:
+            return
+        if self.__is_exact_match:
+            self.__compare_exact(text)
+        if self.__is_tokens_match:
+            tokens = ''.join(text.split())
+            self.__is_tokens_match = self.__read_without_whitespace(self.__tokens_expected_output,
+                                                                    len(tokens)) == tokens
+
+    def __compare_exact(self, text):
+        # biale znaki sa porownywane dopiero gdy pojawi sie za nimi cos jeszcze - moga byc koncem wyjscia
+        text = self.__pending_whitespace + text
+        text_stripped = text.rstrip()
+        self.__pending_whitespace = text[len(text_stripped):]
+        if text_stripped:
+            self.__is_exact_match = self.__exact_expected_output.read(len(text_stripped)) == text_stripped
+
+    @staticmethod
+    def __read_without_whitespace(stream, size):
+        # czyta najwyzej tyle znakow, ile brakuje, wiec nigdy nie przeczyta za duzo
+        text = ''
+        while len(text) < size:
+            chunk = stream.read(size - len(text))
+            if not chunk:
+                break
+            text += ''.join(chunk.split())
+        return text
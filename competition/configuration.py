@@ -0,0 +1,59 @@
+# Konfiguracja zawodow jest czytana z bazy najwyzej raz na zapytanie HTTP, a zwykle wcale - miedzy zapytaniami
+# przechowuje ja pamiec podreczna Django (CACHES) razem z wersja wynikow (ScoreboardVersion), zmieniana przy kazdym
+# zapisie konfiguracji. Kazdy proces porownuje wersje z baza, wiec zmiane zapisana przez inny proces widzi od razu.
+# Lista zadan jest przechowywana przez CONFIGURATION_CACHE_TIMEOUT sekund.
+from asgiref.local import Local
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Configuration, Task, ScoreboardVersion
+
+CONFIGURATION_CACHE_KEY = 'competition-configuration'
+TASKS_CACHE_KEY = 'competition-tasks'
+
+__request_memo = Local()
+
+
+def get_configuration():
+    request_configuration = getattr(__request_memo, 'configuration', None)
+    if request_configuration is not None:
+        return request_configuration
+    # wersja czytana przed konfiguracja - zapis konfiguracji zmienia obie w jednej transakcji
+    version = ScoreboardVersion.objects.values_list('version', flat=True).first()
+    cached_configuration = cache.get(CONFIGURATION_CACHE_KEY)
+    if cached_configuration is not None and cached_configuration[0] == version:
+        configuration = cached_configuration[1]
+    else:
+        configuration = Configuration.objects.all()[0]
+        cache.set(CONFIGURATION_CACHE_KEY, (version, configuration), settings.CONFIGURATION_CACHE_TIMEOUT)
+    if getattr(__request_memo, 'is_request', False):
+        __request_memo.configuration = configuration
+    return configuration
+
+
+def start_request_memo():
+    # poza zapytaniami HTTP (proces oceniajacy, /ranking/events/) konfiguracja nie jest zapamietywana w procesie
+    __request_memo.is_request = True
+    __request_memo.configuration = None
+
+
+def clear_request_memo():
+    __request_memo.is_request = False
+    __request_memo.configuration = None
+
+
+def invalidate_configuration():
+    __request_memo.configuration = None
+    cache.delete(CONFIGURATION_CACHE_KEY)
+
+
+def get_tasks():
+    tasks = cache.get(TASKS_CACHE_KEY)
+    if tasks is None:
+        tasks = list(Task.objects.all().order_by('id'))
+        cache.set(TASKS_CACHE_KEY, tasks, settings.CONFIGURATION_CACHE_TIMEOUT)
+    return tasks
+
+
+def invalidate_tasks():
+    cache.delete(TASKS_CACHE_KEY)
@@ -3,7 +3,7 @@ from django.shortcuts import redirect
 
 def team_user(view_func):
     def wrapper_func(request, *args, **kwargs):
-        if request.user.is_authenticated and request.user.groups.filter(name='team').exists():
+        if request.user.is_authenticated and request.user_roles.has_group('team'):
             return view_func(request, *args, **kwargs)
         return redirect('home')
 
@@ -12,7 +12,7 @@ def team_user(view_func):
 
 def judge_user(view_func):
     def wrapper_func(request, *args, **kwargs):
-        if request.user.is_authenticated and request.user.groups.filter(name='judge').exists():
+        if request.user.is_authenticated and request.user_roles.has_group('judge'):
             return view_func(request, *args, **kwargs)
         return redirect('home')
 
@@ -0,0 +1,141 @@
+# Zmiany rankingu wysylane do przegladarek jako Server-Sent Events (/ranking/events/, tylko przez project/asgi.py).
+# Jeden broadcaster na proces sprawdza ranking co RANKING_EVENTS_POLL_INTERVAL sekund i kazda zmiane rozsyla
+# wszystkim podlaczonym klientom, wysylajac tylko wiersze zespolow, ktorych pozycja lub wynik sie zmienily.
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+
+from .configuration import get_configuration
+from .middleware import get_user_roles
+from .models import Configuration
+from .scoreboard import get_cached_ranking
+
+RANKING_EVENTS_PATH = '/ranking/events/'
+
+
+async def ranking_events(scope, receive, send):
+    user = await sync_to_async(__get_user)(scope)
+    if not user.is_authenticated:
+        await __send_response(send, 403)
+        return
+    is_team = await sync_to_async(get_user_roles(user).has_group)('team')
+    events = asyncio.Queue()
+    ranking_rows = await ranking_broadcaster.add_subscriber(is_team, events)
+    disconnect = asyncio.ensure_future(__wait_for_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache')]})
+        await send({'type': 'http.response.body', 'body': format_ranking_event(list(ranking_rows.values())),
+                    'more_body': True})
+        while not disconnect.done():
+            event = asyncio.ensure_future(events.get())
+            await asyncio.wait([event, disconnect], timeout=settings.RANKING_EVENTS_KEEPALIVE_INTERVAL,
+                               return_when=asyncio.FIRST_COMPLETED)
+            if event.done():
+                body = event.result()
+            else:
+                event.cancel()
+                body = b': keep-alive\n\n'  # komentarz, ktory nie pozwala zamknac bezczynnego polaczenia
+            if not disconnect.done():
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        disconnect.cancel()
+        ranking_broadcaster.remove_subscriber(is_team, events)
+
+
+def get_ranking_rows(is_team, configuration=None):
+    # zespoly dostaja ranking zamrozony, jesli jego widocznosc jest wylaczona
+    if configuration is None:
+        configuration = get_configuration()
+    is_frozen = is_team and configuration.ranking_visibility != Configuration.RankingVisibility.VISIBLE
+    ranking_entries = get_cached_ranking(configuration, is_frozen).ranking_entries
+    return {entry['team_username']: dict(entry, position=position)
+            for position, entry in enumerate(ranking_entries, start=1)}
+
+
+def get_changed_ranking_rows(previous_rows, ranking_rows):
+    return [ranking_row for team_username, ranking_row in ranking_rows.items()
+            if previous_rows.get(team_username) != ranking_row]
+
+
+def format_ranking_event(ranking_rows):
+    return 'event: ranking\ndata: {}\n\n'.format(json.dumps(ranking_rows)).encode('utf-8')
+
+
+class RankingBroadcaster:
+    def __init__(self):
+        self.__subscribers = {False: set(), True: set()}  # czy klient jest zespolem -> kolejki zdarzen klientow
+        self.__ranking_rows = {}  # czy klient jest zespolem -> ostatnio rozeslane wiersze rankingu
+        self.__poll_task = None
+
+    async def add_subscriber(self, is_team, events):
+        # nowy klient dostaje ostatnio rozeslany ranking, a potem zmiany wzgledem niego
+        if is_team not in self.__ranking_rows:
+            ranking_rows = await sync_to_async(get_ranking_rows)(is_team)
+            self.__ranking_rows.setdefault(is_team, ranking_rows)
+        self.__subscribers[is_team].add(events)
+        if self.__poll_task is None:
+            self.__poll_task = asyncio.ensure_future(self.__poll())
+        return self.__ranking_rows[is_team]
+
+    def remove_subscriber(self, is_team, events):
+        self.__subscribers[is_team].discard(events)
+        if not self.__subscribers[is_team]:
+            self.__ranking_rows.pop(is_team, None)
+        if not any(self.__subscribers.values()) and self.__poll_task is not None:
+            self.__poll_task.cancel()
+            self.__poll_task = None
+
+    async def __poll(self):
+        while any(self.__subscribers.values()):
+            subscribed_views = [is_team for is_team, subscribers in self.__subscribers.items() if subscribers]
+            rankings_rows = await sync_to_async(self.__get_rankings_rows)(subscribed_views)
+            for is_team, ranking_rows in rankings_rows.items():
+                self.__broadcast(is_team, ranking_rows)
+            await asyncio.sleep(settings.RANKING_EVENTS_POLL_INTERVAL)
+
+    def __broadcast(self, is_team, ranking_rows):
+        previous_rows = self.__ranking_rows.get(is_team)
+        self.__ranking_rows[is_team] = ranking_rows
+        if previous_rows is None:
+            return
+        changed_rows = get_changed_ranking_rows(previous_rows, ranking_rows)
+        if changed_rows:
+            event = format_ranking_event(changed_rows)
+            for events in self.__subscribers[is_team]:
+                events.put_nowait(event)
+
+    @staticmethod
+    def __get_rankings_rows(subscribed_views):
+        configuration = get_configuration()
+        return {is_team: get_ranking_rows(is_team, configuration) for is_team in subscribed_views}
+
+
+ranking_broadcaster = RankingBroadcaster()
+
+
+def __get_user(scope):
+    cookies = SimpleCookie()
+    for header_name, header_value in scope['headers']:
+        if header_name == b'cookie':
+            cookies.load(header_value.decode('latin-1'))
+    session_cookie = cookies.get(settings.SESSION_COOKIE_NAME)
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    session = session_store(session_cookie.value if session_cookie is not None else None)
+    return get_user(SimpleNamespace(session=session))
+
+
+async def __wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def __send_response(send, status):
+    await send({'type': 'http.response.start', 'status': status, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
@@ -0,0 +1,73 @@
+# Publiczny ranking zapisywany jako pliki statyczne (RANKING_EXPORT_DIR) po kazdej zmianie wynikow, zeby kibicow
+# mogl obslugiwac zwykly serwer plikow bez udzialu Django i bazy danych.
+# Pliki sa podmieniane atomowo (os.replace), wiec czytajacy zawsze dostaje caly ranking - stary albo nowy.
+import fcntl
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .configuration import get_configuration
+from .models import Configuration
+from .scoreboard import get_scoreboard_version, get_ranking_entries, get_frozen_ranking_entries
+
+RANKING_EXPORT_HTML_NAME = 'ranking.html'
+RANKING_EXPORT_JSON_NAME = 'ranking.json'
+RANKING_EXPORT_LOCK_NAME = '.lock'
+
+__exported_versions = {}  # katalog -> ostatnio zapisana wersja wynikow
+
+
+def export_ranking(force=False):
+    export_dir = settings.RANKING_EXPORT_DIR
+    if export_dir is None:
+        return False
+    os.makedirs(export_dir, exist_ok=True)
+    # eksport z kilku procesow (serwer, proces oceniajacy) odbywa sie po kolei, wiec ostatni zapisuje najnowsza wersje
+    with open(os.path.join(export_dir, RANKING_EXPORT_LOCK_NAME), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        version = get_scoreboard_version()
+        if not force and __exported_versions.get(str(export_dir)) == version:
+            return False  # wersja zmienia sie takze przy zapisie konfiguracji (np. widocznosci rankingu)
+        try:
+            configuration = get_configuration()
+        except IndexError:
+            return False  # zawody nie zostaly jeszcze skonfigurowane
+        # kibice widza to samo co zespoly - po wylaczeniu widocznosci ranking zamrozony
+        is_frozen = configuration.ranking_visibility != Configuration.RankingVisibility.VISIBLE
+        if is_frozen:
+            ranking_entries = get_frozen_ranking_entries(configuration)
+        else:
+            ranking_entries = get_ranking_entries(configuration)
+        ranking_entries = [dict(entry, position=position) for position, entry in enumerate(ranking_entries, start=1)]
+        export_time = timezone.now()
+
+        __write_atomically(os.path.join(export_dir, RANKING_EXPORT_JSON_NAME), json.dumps({
+            'is_frozen': is_frozen,
+            'export_time': export_time.isoformat(),
+            'teams_count': len(ranking_entries),
+            'ranking_entries': ranking_entries,
+        }))
+        __write_atomically(os.path.join(export_dir, RANKING_EXPORT_HTML_NAME), render_to_string(
+            'competition/ranking_export.html', {'ranking_entries': ranking_entries, 'is_frozen': is_frozen,
+                                                'configuration': configuration, 'export_time': export_time}))
+        __exported_versions[str(export_dir)] = version
+    return True
+
+
+def __write_atomically(path, content):
+    # plik tymczasowy musi byc w tym samym katalogu, bo os.replace jest atomowe tylko w obrebie jednego systemu plikow
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as temporary_file:
+            temporary_file.write(content)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
@@ -0,0 +1,149 @@
+# Szablon interpretera dla rozwiazan uczestnikow.
+# Proces jest uruchamiany raz (competition/runner.py) i dla kazdego testu tworzy fork z juz zainicjalizowanego
+# interpretera, wiec koszt startu Pythona ponoszony jest raz na proces oceniajacy, a nie raz na test.
+# Plik nie moze importowac Django ani modulow projektu - kazdy import trafia do procesow rozwiazan.
+import json
+import marshal
+import os
+import resource
+import select
+import signal
+import socket
+import struct
+import sys
+import time
+import traceback
+
+MESSAGE_HEADER = struct.Struct('!I')
+REQUEST_FDS_COUNT = 4  # stdin, stdout, stderr procesu rozwiazania oraz plik w pamieci ze skompilowanym kodem
+
+
+def serve(server_socket):
+    while True:
+        try:
+            request, fds = receive_message(server_socket, REQUEST_FDS_COUNT)
+        except EOFError:
+            return
+        start_time = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            server_socket.close()
+            run_solution(request, fds)
+        set_process_group(pid)
+        for fd in fds:
+            os.close(fd)
+        send_message(server_socket, {'pid': pid})
+        send_message(server_socket, wait_for_solution(pid, start_time, request['wall_time_limit']))
+
+
+def set_process_group(pid):
+    # rozwiazanie i jego ewentualne procesy potomne sa zabijane razem po przekroczeniu czasu
+    try:
+        os.setpgid(pid, pid)
+    except OSError:
+        pass  # proces potomny zdazyl juz sam zmienic grupe lub sie zakonczyc
+
+
+def wait_for_solution(pid, start_time, wall_time_limit):
+    process_fd = os.pidfd_open(pid)
+    try:
+        is_finished, _, _ = select.select([process_fd], [], [], wall_time_limit)
+    finally:
+        os.close(process_fd)
+    # procesy potomne rozwiazania sa zabijane takze wtedy, gdy samo rozwiazanie juz sie zakonczylo - inaczej trzymalyby
+    # otwarte stdout i stderr, a proces oceniajacy czekalby na koniec wyjscia; grupa istnieje do odebrania statusu
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    _, wait_status, usage = os.wait4(pid, 0)
+    return {
+        'exit_code': os.waitstatus_to_exitcode(wait_status),
+        'is_wall_time_exceeded': not is_finished,
+        'wall_time': time.monotonic() - start_time,
+        'cpu_time': usage.ru_utime + usage.ru_stime,
+        'memory_usage': usage.ru_maxrss,  # w kilobajtach
+    }
+
+
+def set_limits(request):
+    cpu_time_limit = int(request['cpu_time_limit']) + 1  # RLIMIT_CPU ma dokladnosc do sekundy
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_time_limit, cpu_time_limit + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (request['memory_limit'], request['memory_limit']))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def run_solution(request, fds):
+    os.setpgid(0, 0)
+    *standard_fds, code_fd = fds
+    for target_fd, fd in enumerate(standard_fds):
+        os.dup2(fd, target_fd)
+        os.close(fd)
+    sys.stdin = open(0, 'r', encoding='utf-8', closefd=False)
+    sys.stdout = open(1, 'w', encoding='utf-8', closefd=False)
+    sys.stderr = open(2, 'w', encoding='utf-8', closefd=False)
+
+    exit_code = 0
+    try:
+        # kod rozwiazania jest kompilowany raz przez proces oceniajacy, tutaj ladowany jest gotowy bytecode;
+        # pread nie przesuwa wspoldzielonej pozycji w pliku, wiec rownolegle testy sobie nie przeszkadzaja
+        code = marshal.loads(os.pread(code_fd, os.fstat(code_fd).st_size, 0))
+        os.close(code_fd)
+        sys.argv = [code.co_filename]
+        sys.path[0] = os.getcwd()
+        set_limits(request)
+        exec(code, {'__name__': '__main__', '__builtins__': __builtins__})
+    except SystemExit as exit_request:
+        exit_code = get_exit_code(exit_request)
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+
+    try:
+        sys.stdout.flush()
+    except BaseException:
+        traceback.print_exc()
+        exit_code = exit_code or 1
+    sys.stderr.flush()
+    os._exit(exit_code)
+
+
+def get_exit_code(exit_request):
+    if exit_request.code is None:
+        return 0
+    if isinstance(exit_request.code, int):
+        return exit_request.code
+    print(exit_request.code, file=sys.stderr)
+    return 1
+
+
+def send_message(message_socket, message, fds=()):
+    body = json.dumps(message).encode('utf-8')
+    socket.send_fds(message_socket, [MESSAGE_HEADER.pack(len(body))], list(fds))
+    message_socket.sendall(body)
+
+
+def receive_message(message_socket, max_fds=0):
+    header, fds, _, _ = socket.recv_fds(message_socket, MESSAGE_HEADER.size, max_fds)
+    if not header:
+        raise EOFError
+    header += receive_exactly(message_socket, MESSAGE_HEADER.size - len(header))
+    body_size, = MESSAGE_HEADER.unpack(header)
+    return json.loads(receive_exactly(message_socket, body_size)), fds
+
+
+def receive_exactly(message_socket, size):
+    data = b''
+    while len(data) < size:
+        chunk = message_socket.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+if __name__ == '__main__':
+    try:
+        serve(socket.socket(fileno=int(sys.argv[1])))
+    except KeyboardInterrupt:
+        pass
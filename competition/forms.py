@@ -1,5 +1,5 @@
 from django import forms
-from .models import Configuration
+from .models import Configuration, Solution
 
 
 class ConfigPanelForm(forms.Form):
@@ -8,4 +8,5 @@ class ConfigPanelForm(forms.Form):
 
 
 class SolutionForm(forms.Form):
-    solution = forms.CharField(widget=forms.Textarea, label="Rozwiązanie")
\ No newline at end of file
+    solution = forms.CharField(widget=forms.Textarea, label="Rozwiązanie",
+                               max_length=Solution._meta.get_field('content').max_length)
\ No newline at end of file
@@ -0,0 +1,338 @@
+import datetime
+import hashlib
+import io
+import logging
+import os
+import signal
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from enum import Enum
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Count, Max
+from django.utils import timezone
+
+from .checker import OutputChecker
+from .models import Solution, SolutionTestResult, Task, Test, JudgeQueueEntry, VerdictCacheEntry
+from .runner import create_code_file, run_solution, RunLimits
+from .scoreboard import update_scoreboard
+
+SOLUTION_SCRIPT_NAME = 'solution.py'
+
+# testy zadania z danymi wbudowanymi w model juz znormalizowanymi (test.id -> bajty wejscia / oczekiwane wyjscie)
+TaskTests = namedtuple('TaskTests', ['fingerprint', 'tests', 'tests_hash', 'inputs', 'outputs'])
+
+verdict_cache_statistics = {'hits': 0, 'misses': 0}
+
+logger = logging.getLogger(__name__)
+
+__task_tests_cache = {}  # task.id -> TaskTests
+
+
+def enqueue_solution(solution):
+    return JudgeQueueEntry.objects.create(solution=solution)
+
+
+def run_pending_jobs():
+    judged_solutions_count = 0
+    job = claim_next_job()
+    while job is not None:
+        try:
+            judge_job(job)
+            judged_solutions_count += 1
+        except Exception:
+            logger.exception('Błąd oceny rozwiązania %s', job.solution_id)
+        job = claim_next_job()
+    return judged_solutions_count
+
+
+def claim_next_job():
+    now = timezone.now()
+    stale_claim_time = now - datetime.timedelta(seconds=settings.JUDGE_CLAIM_TIMEOUT)
+    pending_jobs = JudgeQueueEntry.objects.filter(Q(claim_time=None) | Q(claim_time__lt=stale_claim_time)).order_by(
+        'enqueue_time', 'id')
+    for job in pending_jobs[:settings.JUDGE_CLAIM_BATCH_SIZE]:
+        # zajmujemy zadanie tylko jesli nikt inny nie zrobil tego w miedzyczasie
+        is_claimed = JudgeQueueEntry.objects.filter(id=job.id, claim_time=job.claim_time).update(claim_time=now)
+        if is_claimed:
+            job.claim_time = now
+            return job
+    return None
+
+
+def judge_job(job):
+    solution = Solution.objects.select_related('task').get(id=job.solution_id)
+    try:
+        judge_solution(solution, job)
+    except Exception:
+        __record_failed_attempt(job, solution)
+        raise
+    return solution
+
+
+def judge_solution(solution, job=None):
+    task = solution.task
+    task_tests = get_task_tests(task)
+    cache_entry = VerdictCacheEntry(task=task, solution=solution, content_hash=__hash_solution_content(solution),
+                                    tests_hash=task_tests.tests_hash)
+    cached_solution = __get_cached_solution(cache_entry)
+    if cached_solution is not None:
+        verdict_cache_statistics['hits'] += 1
+        solution_status = cached_solution.solution_status
+        test_results = __copy_test_results(cached_solution, solution)
+        cache_entry = None
+    else:
+        verdict_cache_statistics['misses'] += 1
+        solution_status, test_results = __evaluate_solution(solution, task_tests)
+        if solution_status == Solution.SolutionStatus.TIME_EXCEEDED_ERROR:
+            cache_entry = None  # przekroczenie czasu zalezy od obciazenia maszyny, wiec nie jest zapamietywane
+    __save_verdict(solution, solution_status, test_results, job, cache_entry)
+    return solution.solution_status
+
+
+def get_task_tests(task):
+    # testy sa wczytywane i normalizowane raz na proces; przy kazdym ocenianiu jedno male zapytanie sprawdza tylko,
+    # czy ktorys z nich nie zostal zmieniony, dodany lub usuniety
+    fingerprint = __get_tests_fingerprint(task)
+    task_tests = __task_tests_cache.get(task.id)
+    if task_tests is None or task_tests.fingerprint != fingerprint:
+        task_tests = __task_tests_cache[task.id] = __load_task_tests(task, fingerprint)
+    return task_tests
+
+
+def get_verdict_cache_hit_rate():
+    lookups_count = verdict_cache_statistics['hits'] + verdict_cache_statistics['misses']
+    if lookups_count == 0:
+        return 0
+    return verdict_cache_statistics['hits'] / lookups_count
+
+
+def __hash_solution_content(solution):
+    # tresc jest juz znormalizowana przy zapisie (__sanitize_solution_content)
+    return hashlib.sha256(solution.content.encode('utf-8')).hexdigest()
+
+
+def __get_tests_fingerprint(task):
+    tests_summary = Test.objects.filter(task=task).aggregate(Count('id'), Max('id'), Max('modification_time'))
+    return (task.evaluation_policy, task.cpu_time_limit_in_seconds, task.wall_time_limit_in_seconds,
+            task.memory_limit_in_megabytes, tests_summary['id__count'], tests_summary['id__max'],
+            tests_summary['modification_time__max'])
+
+
+def __load_task_tests(task, fingerprint):
+    tests = list(Test.objects.all().filter(task=task).order_by('group', 'id'))
+    inputs = {test.id: test.input.replace('\\n', '\n').encode('utf-8') for test in tests if not test.input_file}
+    outputs = {test.id: test.output.replace('\\n', '\n') for test in tests if not test.output_file}
+    return TaskTests(fingerprint, tests, __hash_tests(task, tests), inputs, outputs)
+
+
+def __hash_tests(task, tests):
+    # werdykt zalezy tez od sposobu oceniania i limitow zadania
+    tests_description = [(task.evaluation_policy, task.cpu_time_limit_in_seconds, task.wall_time_limit_in_seconds,
+                          task.memory_limit_in_megabytes)]
+    tests_description += [(test.id, test.group, test.input, test.output, test.input_file.name, test.output_file.name)
+                          for test in tests]
+    return hashlib.sha256(repr(tests_description).encode('utf-8')).hexdigest()
+
+
+def __get_cached_solution(cache_entry):
+    cached_entry = VerdictCacheEntry.objects.filter(task=cache_entry.task, content_hash=cache_entry.content_hash,
+                                                    tests_hash=cache_entry.tests_hash).select_related('solution').first()
+    if cached_entry is None:
+        return None
+    return cached_entry.solution
+
+
+def __copy_test_results(source_solution, solution):
+    return [SolutionTestResult(solution=solution, test_id=test_result.test_id, did_pass=test_result.did_pass,
+                               was_run=test_result.was_run, cpu_time_in_seconds=test_result.cpu_time_in_seconds,
+                               wall_time_in_seconds=test_result.wall_time_in_seconds,
+                               memory_usage_in_kilobytes=test_result.memory_usage_in_kilobytes)
+            for test_result in SolutionTestResult.objects.filter(solution=source_solution)]
+
+
+def __evaluate_solution(solution, task_tests):
+    try:
+        solution_code = compile(solution.content, SOLUTION_SCRIPT_NAME, 'exec')
+    except (SyntaxError, ValueError):
+        return Solution.SolutionStatus.COMPILATION_ERROR, __skip_tests(task_tests.tests, solution)
+    except (RecursionError, MemoryError):
+        # zbyt gleboko zagniezdzone wyrazenia przepelniaja stos kompilatora - to blad rozwiazania, nie oceniania
+        return Solution.SolutionStatus.RUNTIME_ERROR, __skip_tests(task_tests.tests, solution)
+    solution_code_fd = create_code_file(solution_code)
+    try:
+        return __run_tests(solution_code_fd, solution.task, task_tests, solution)
+    finally:
+        os.close(solution_code_fd)
+
+
+def __save_verdict(solution, solution_status, test_results, job, cache_entry):
+    # werdykt, wyniki testow, wynik zespolu i usuniecie zadania z kolejki trafiaja do bazy w jednej transakcji
+    with transaction.atomic():
+        # poprzedni werdykt czytany z zablokowanego wiersza - rownolegle zapisy werdyktu tego rozwiazania ida po kolei
+        previous_solution_status = Solution.objects.select_for_update().values_list(
+            'solution_status', flat=True).get(id=solution.id)
+        solution.solution_status = previous_solution_status
+        if job is not None:
+            is_claimed = JudgeQueueEntry.objects.select_for_update().filter(
+                id=job.id, claim_time=job.claim_time).first() is not None
+            if not is_claimed or previous_solution_status != Solution.SolutionStatus.NOT_EVALUATED:
+                # zadanie przejal (po JUDGE_CLAIM_TIMEOUT) i moze juz ocenil inny proces oceniajacy
+                return
+        # pozostalosci po przerwanym ocenianiu tego samego rozwiazania
+        SolutionTestResult.objects.filter(solution=solution).delete()
+        SolutionTestResult.objects.bulk_create(test_results)
+        solution.solution_status = solution_status
+        solution.save(update_fields=['solution_status'])
+        update_scoreboard(solution, previous_solution_status)
+        if cache_entry is not None:
+            VerdictCacheEntry.objects.bulk_create([cache_entry], ignore_conflicts=True)
+        if job is not None:
+            job.delete()
+
+
+def __record_failed_attempt(job, solution):
+    # zadanie wraca do kolejki, a po JUDGE_MAX_ATTEMPTS nieudanych probach rozwiazanie dostaje werdykt RUNTIME_ERROR,
+    # zeby jedno rozwiazanie nie bylo oceniane w nieskonczonosc
+    job.attempts_count += 1
+    if job.attempts_count < settings.JUDGE_MAX_ATTEMPTS:
+        JudgeQueueEntry.objects.filter(id=job.id, claim_time=job.claim_time).update(
+            claim_time=None, attempts_count=job.attempts_count)
+        return
+    tests = Test.objects.filter(task_id=solution.task_id).order_by('id')
+    __save_verdict(solution, Solution.SolutionStatus.RUNTIME_ERROR, __skip_tests(tests, solution), job, None)
+
+
+def __skip_tests(tests, solution):
+    return [__create_test_result(solution, test, None, None) for test in tests]
+
+
+def __run_tests(solution_code_fd, task, task_tests, solution):
+    tests = task_tests.tests
+    test_groups = __get_test_groups(task, tests)
+    should_stop_group_on_failure = task.evaluation_policy != Task.EvaluationPolicy.RUN_ALL
+    limits = RunLimits(task.cpu_time_limit_in_seconds, task.wall_time_limit_in_seconds,
+                       task.memory_limit_in_megabytes * 1024 * 1024)
+
+    def run_test(test):
+        return __run_test(solution_code_fd, test, limits, task_tests)
+
+    # kazdy test to osobny proces (fork szablonu interpretera), wiec watki jedynie je uruchamiaja i czekaja na wynik
+    with ThreadPoolExecutor(max_workers=settings.JUDGE_TEST_WORKERS) as executor:
+        test_results = __run_test_groups(executor, run_test, test_groups, should_stop_group_on_failure)
+
+    solution_test_results = [__create_test_result(solution, test, *test_results.get(test, (None, None)))
+                             for test in tests]  # brak wyniku - test pominiety
+    solution_status = __reduce_test_results(test_results[test][0] for test in tests if test in test_results)
+    return solution_status, solution_test_results
+
+
+def __create_test_result(solution, test, test_result, run_result):
+    if run_result is None:
+        return SolutionTestResult(solution=solution, test=test, did_pass=False, was_run=False)
+    return SolutionTestResult(solution=solution, test=test, did_pass=test_result == TestResult.OKAY,
+                              cpu_time_in_seconds=run_result.cpu_time, wall_time_in_seconds=run_result.wall_time,
+                              memory_usage_in_kilobytes=run_result.memory_usage)
+
+
+def __get_test_groups(task, tests):
+    if task.evaluation_policy == Task.EvaluationPolicy.TEST_GROUPS:
+        return [list(group_tests) for _, group_tests in groupby(tests, key=lambda test: test.group)]
+    return [tests]
+
+
+def __run_test_groups(executor, run_test, test_groups, should_stop_group_on_failure):
+    waiting_tests = deque((test, group_index) for group_index, group_tests in enumerate(test_groups)
+                          for test in group_tests)
+    running_tests = {}
+    failed_groups = set()
+    test_results = {}
+    while waiting_tests or running_tests:
+        # kolejne testy startuja dopiero gdy zwolni sie miejsce, zeby niezaliczony test mogl pominac reszte grupy
+        while waiting_tests and len(running_tests) < settings.JUDGE_TEST_WORKERS:
+            test, group_index = waiting_tests.popleft()
+            if group_index not in failed_groups:
+                running_tests[executor.submit(run_test, test)] = (test, group_index)
+        if not running_tests:
+            break
+
+        finished_tests, _ = wait(running_tests, return_when=FIRST_COMPLETED)
+        for future in finished_tests:
+            test, group_index = running_tests.pop(future)
+            test_result, run_result = future.result()
+            test_results[test] = (test_result, run_result)
+            if test_result is not TestResult.OKAY and should_stop_group_on_failure:
+                failed_groups.add(group_index)
+    return test_results
+
+
+def __reduce_test_results(test_results):
+    for test_result in test_results:
+        if test_result is TestResult.TIME_EXCEEDED_ERROR:
+            return Solution.SolutionStatus.TIME_EXCEEDED_ERROR
+        elif test_result is TestResult.RUNTIME_ERROR:
+            return Solution.SolutionStatus.RUNTIME_ERROR
+        elif test_result is TestResult.COMPILATION_ERROR:
+            return Solution.SolutionStatus.COMPILATION_ERROR
+        elif test_result is TestResult.PRESENTATION_ERROR:
+            return Solution.SolutionStatus.PRESENTATION_ERROR
+        elif test_result is TestResult.WRONG_ANSWER:
+            return Solution.SolutionStatus.INCORRECT
+    return Solution.SolutionStatus.CORRECT
+
+
+def __run_test(code_fd, test, limits, task_tests):
+    with __open_test_input(test, task_tests) as solution_input, \
+            OutputChecker(lambda: __open_test_output(test, task_tests), settings.JUDGE_OUTPUT_LIMIT,
+                          strip_expected_output=bool(test.output_file)) as output_checker:
+        result = run_solution(code_fd, solution_input, output_checker, limits)
+        return __evaluate_run_result(result, output_checker, limits), result
+
+
+def __open_test_input(test, task_tests):
+    # duze dane testowe sa przechowywane w plikach i przekazywane rozwiazaniu bez wczytywania do pamieci
+    if test.input_file:
+        return open(test.input_file.path, 'rb')
+    return io.BytesIO(task_tests.inputs[test.id])
+
+
+def __open_test_output(test, task_tests):
+    if test.output_file:
+        return open(test.output_file.path, encoding='utf-8', errors='replace')
+    return io.StringIO(task_tests.outputs[test.id])
+
+
+def __evaluate_run_result(result, output_checker, limits):
+    if __is_time_exceeded(result, limits):
+        return TestResult.TIME_EXCEEDED_ERROR
+    if output_checker.is_output_limit_exceeded:
+        return TestResult.WRONG_ANSWER
+    if result.exit_code != 0:
+        return __evaluate_error(result.stderr)
+    if output_checker.is_output_correct():
+        return TestResult.OKAY
+    if output_checker.is_presentation_error():
+        return TestResult.PRESENTATION_ERROR
+    return TestResult.WRONG_ANSWER
+
+
+def __is_time_exceeded(result, limits):
+    return result.is_wall_time_exceeded or result.cpu_time > limits.cpu_time or \
+        result.exit_code == -signal.SIGXCPU
+
+
+def __evaluate_error(error_message):
+    if 'SyntaxError' in error_message:
+        return TestResult.COMPILATION_ERROR
+    return TestResult.RUNTIME_ERROR
+
+
+class TestResult(Enum):
+    OKAY = 1
+    WRONG_ANSWER = 2
+    PRESENTATION_ERROR = 3
+    COMPILATION_ERROR = 4
+    RUNTIME_ERROR = 5
+    TIME_EXCEEDED_ERROR = 6
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from competition.export import export_ranking
+
+
+class Command(BaseCommand):
+    help = 'Zapisuje publiczny ranking jako pliki statyczne w katalogu RANKING_EXPORT_DIR'
+
+    def handle(self, *args, **options):
+        if settings.RANKING_EXPORT_DIR is None:
+            raise CommandError('Eksport rankingu jest wyłączony (RANKING_EXPORT_DIR = None)')
+        if not export_ranking(force=True):
+            raise CommandError('Brak konfiguracji zawodów')
+        self.stdout.write('Zapisano ranking w katalogu: {}'.format(settings.RANKING_EXPORT_DIR))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from competition.scoreboard import rebuild_scoreboard
+
+
+class Command(BaseCommand):
+    help = 'Przelicza od nowa wyniki wszystkich zespołów na podstawie ocenionych rozwiązań'
+
+    def handle(self, *args, **options):
+        teams_count = rebuild_scoreboard()
+        self.stdout.write('Przeliczono wyniki zespołów: {}'.format(teams_count))
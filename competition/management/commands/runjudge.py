@@ -0,0 +1,51 @@
+import time
+import traceback
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from competition.judge import claim_next_job, judge_job, run_pending_jobs, get_verdict_cache_hit_rate
+from competition.models import Configuration
+from competition.warmup import warm_up_judge
+
+
+class Command(BaseCommand):
+    help = 'Ocenia rozwiązania oczekujące w kolejce'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Ocenia rozwiązania obecne w kolejce i kończy działanie')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            judged_solutions_count = run_pending_jobs()
+            self.stdout.write('Oceniono rozwiązań: {} (trafienia w pamięci podręcznej werdyktów: {:.0%})'.format(
+                judged_solutions_count, get_verdict_cache_hit_rate()))
+            return
+
+        warm_up_judge()
+        competition_status = self.__get_competition_status()
+        self.stdout.write('Oczekiwanie na rozwiązania...')
+        while True:
+            job = claim_next_job()
+            if job is None:
+                # sedziowie mogli zmienic testy przed startem zawodow - wczytujemy je ponownie, zanim zespoly
+                # zaczna wysylac rozwiazania
+                previous_competition_status, competition_status = competition_status, self.__get_competition_status()
+                if competition_status == Configuration.CompetitionStatus.ACTIVE and \
+                        previous_competition_status != Configuration.CompetitionStatus.ACTIVE:
+                    warm_up_judge()
+                time.sleep(settings.JUDGE_POLL_INTERVAL)
+                continue
+            try:
+                solution = judge_job(job)
+            except Exception:
+                # blad jednego rozwiazania nie zatrzymuje procesu oceniajacego (patrz JUDGE_MAX_ATTEMPTS)
+                self.stderr.write('Błąd oceny rozwiązania {}:\n{}'.format(job.solution_id, traceback.format_exc()))
+                continue
+            self.stdout.write('Rozwiązanie {}: {} (trafienia w pamięci podręcznej werdyktów: {:.0%})'.format(
+                solution.id, solution.get_solution_status_display(), get_verdict_cache_hit_rate()))
+
+    def __get_competition_status(self):
+        # czytany z bazy, bo konfiguracja w pamieci podrecznej tego procesu moze byc nieaktualna
+        return Configuration.objects.values_list('competition_status', flat=True).first()
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from competition.warmup import warm_up, is_cache_shared
+
+
+class Command(BaseCommand):
+    help = 'Wczytuje konfigurację i zadania do wspólnej pamięci podręcznej (CACHES) na ' \
+           'CONFIGURATION_CACHE_TIMEOUT sekund i tworzy zamrożony ranking - uruchamiać tuż przed startem zawodów'
+
+    def handle(self, *args, **options):
+        if not is_cache_shared():
+            raise CommandError('Pamięć podręczna (CACHES) nie jest wspólna dla procesów - polecenie wypełniłoby '
+                               'tylko pamięć własnego procesu')
+        tasks_count = warm_up()
+        self.stdout.write('Przygotowano zadania: {} (na {} s)'.format(tasks_count,
+                                                                      settings.CONFIGURATION_CACHE_TIMEOUT))
@@ -0,0 +1,42 @@
+from django.utils.functional import cached_property, SimpleLazyObject
+
+from users.models import Team
+
+
+class UserRolesMiddleware:
+    # role (grupy) i zespol uzytkownika sa ustalane raz na zapytanie i dopiero wtedy, gdy ktos o nie zapyta;
+    # dekoratory, widoki i filtr has_group korzystaja z tego samego obiektu (request.user_roles)
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_roles = SimpleLazyObject(lambda: get_user_roles(request.user))
+        return self.get_response(request)
+
+
+class UserRoles:
+    def __init__(self, user):
+        self.__user = user
+
+    @cached_property
+    def group_names(self):
+        if not self.__user.is_authenticated:
+            return frozenset()
+        return frozenset(self.__user.groups.values_list('name', flat=True))
+
+    @cached_property
+    def team(self):
+        if not self.has_group('team'):
+            return None
+        return Team.objects.filter(team_as_user=self.__user).select_related('team_as_user').first()
+
+    def has_group(self, group_name):
+        return group_name in self.group_names
+
+
+def get_user_roles(user):
+    # role sa zapamietywane na obiekcie uzytkownika, ktory jest jeden na cale zapytanie
+    user_roles = getattr(user, 'roles', None)
+    if user_roles is None:
+        user_roles = user.roles = UserRoles(user)
+    return user_roles
@@ -0,0 +1,27 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0005_auto_20210129_2306'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JudgeQueueEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enqueue_time', models.DateTimeField(auto_now_add=True)),
+                ('claim_time', models.DateTimeField(blank=True, null=True)),
+                ('solution', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='competition.solution')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='judgequeueentry',
+            index=models.Index(fields=['claim_time', 'enqueue_time'], name='competition_claim_t_1d561d_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0006_judge_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solutiontestresult',
+            name='was_run',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='evaluation_policy',
+            field=models.IntegerField(choices=[(0, 'Wszystkie testy'), (1, 'Do pierwszego niezaliczonego testu'), (2, 'Grupy testów (niezaliczony test pomija resztę grupy)')], default=0),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='group',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0007_evaluation_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solutiontestresult',
+            name='cpu_time_in_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='solutiontestresult',
+            name='memory_usage_in_kilobytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='solutiontestresult',
+            name='wall_time_in_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='cpu_time_limit_in_seconds',
+            field=models.FloatField(default=2),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='memory_limit_in_megabytes',
+            field=models.PositiveIntegerField(default=256),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='wall_time_limit_in_seconds',
+            field=models.FloatField(default=5),
+        ),
+    ]
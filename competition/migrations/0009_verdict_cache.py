@@ -0,0 +1,28 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0008_resource_limits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerdictCacheEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('tests_hash', models.CharField(max_length=64)),
+                ('solution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='competition.solution')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='competition.task')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='verdictcacheentry',
+            constraint=models.UniqueConstraint(fields=('task', 'content_hash', 'tests_hash'), name='unique_verdict_cache_entry'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0009_verdict_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='input_file',
+            field=models.FileField(blank=True, upload_to='tests'),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='output_file',
+            field=models.FileField(blank=True, upload_to='tests'),
+        ),
+        migrations.AlterField(
+            model_name='test',
+            name='input',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AlterField(
+            model_name='test',
+            name='output',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+    ]
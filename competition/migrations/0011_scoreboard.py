@@ -0,0 +1,46 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+CORRECT = 2
+NOT_EVALUATED = 1
+INCORRECT_SOLUTION_PENALTY = 1200
+
+
+def create_scoreboard_entries(apps, schema_editor):
+    Team = apps.get_model('users', 'Team')
+    ScoreboardEntry = apps.get_model('competition', 'ScoreboardEntry')
+    is_correct = models.Q(solution__solution_status=CORRECT)
+    is_evaluated = ~models.Q(solution__solution_status=NOT_EVALUATED)
+    teams = Team.objects.annotate(
+        correct_solutions_count=models.Count('solution__id', filter=is_correct),
+        incorrect_solutions_count=models.Count('solution__id', filter=~is_correct & is_evaluated),
+        last_correct_solution_time=models.Max('solution__upload_time', filter=is_correct))
+    ScoreboardEntry.objects.bulk_create([
+        ScoreboardEntry(team=team, correct_solutions_count=team.correct_solutions_count,
+                        penalty_time_in_seconds=team.incorrect_solutions_count * INCORRECT_SOLUTION_PENALTY,
+                        last_correct_solution_time=team.last_correct_solution_time)
+        for team in teams])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_auto_20210130_1119'),
+        ('competition', '0010_test_files'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreboardEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('correct_solutions_count', models.PositiveIntegerField(default=0)),
+                ('penalty_time_in_seconds', models.PositiveIntegerField(default=0)),
+                ('last_correct_solution_time', models.DateTimeField(blank=True, null=True)),
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='users.team')),
+            ],
+        ),
+        migrations.RunPython(create_scoreboard_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0011_scoreboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('freeze_time', models.DateTimeField(unique=True)),
+                ('ranking_entries', models.JSONField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:31
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0012_ranking_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreboardVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.UUIDField(default=uuid.uuid4)),
+            ],
+        ),
+    ]
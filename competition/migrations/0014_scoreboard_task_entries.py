@@ -0,0 +1,66 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+CORRECT = 2
+NOT_EVALUATED = 1
+INCORRECT_SOLUTION_PENALTY = 1200
+
+
+def create_scoreboard_task_entries(apps, schema_editor):
+    Solution = apps.get_model('competition', 'Solution')
+    ScoreboardEntry = apps.get_model('competition', 'ScoreboardEntry')
+    ScoreboardTaskEntry = apps.get_model('competition', 'ScoreboardTaskEntry')
+    task_entries = {}
+    solutions = Solution.objects.exclude(solution_status=NOT_EVALUATED).order_by('upload_time', 'id').values_list(
+        'team_id', 'task_id', 'solution_status', 'upload_time')
+    for team_id, task_id, solution_status, upload_time in solutions.iterator():
+        task_entry = task_entries.setdefault((team_id, task_id), ScoreboardTaskEntry(team_id=team_id, task_id=task_id))
+        if task_entry.accepted_solution_time is not None:
+            continue
+        if solution_status == CORRECT:
+            task_entry.accepted_solution_time = upload_time
+        else:
+            task_entry.incorrect_solutions_count += 1
+    ScoreboardTaskEntry.objects.bulk_create(task_entries.values())
+
+    teams_task_entries = {}
+    for (team_id, _), task_entry in task_entries.items():
+        teams_task_entries.setdefault(team_id, []).append(task_entry)
+    # wynik zespolu liczy teraz rozwiazane zadania i pomija rozwiazania wyslane po zaakceptowaniu zadania
+    for scoreboard_entry in ScoreboardEntry.objects.all():
+        team_task_entries = teams_task_entries.get(scoreboard_entry.team_id, [])
+        accepted_solution_times = [task_entry.accepted_solution_time for task_entry in team_task_entries
+                                   if task_entry.accepted_solution_time is not None]
+        scoreboard_entry.correct_solutions_count = len(accepted_solution_times)
+        scoreboard_entry.penalty_time_in_seconds = INCORRECT_SOLUTION_PENALTY * sum(
+            task_entry.incorrect_solutions_count for task_entry in team_task_entries)
+        scoreboard_entry.last_correct_solution_time = max(accepted_solution_times, default=None)
+        scoreboard_entry.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_auto_20210130_1119'),
+        ('competition', '0013_scoreboard_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreboardTaskEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('incorrect_solutions_count', models.PositiveIntegerField(default=0)),
+                ('accepted_solution_time', models.DateTimeField(blank=True, null=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='competition.task')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.team')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='scoreboardtaskentry',
+            constraint=models.UniqueConstraint(fields=('team', 'task'), name='unique_scoreboard_task_entry'),
+        ),
+        migrations.RunPython(create_scoreboard_task_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+NOT_EVALUATED = 1
+
+
+def create_verdict_events(apps, schema_editor):
+    # dotychczasowe werdykty trafiaja do dziennika, zeby dalo sie odtworzyc ranking sprzed migracji
+    Solution = apps.get_model('competition', 'Solution')
+    VerdictEvent = apps.get_model('competition', 'VerdictEvent')
+    VerdictEvent.objects.bulk_create([
+        VerdictEvent(solution_id=solution.id, team_id=solution.team_id, task_id=solution.task_id,
+                     solution_status=solution.solution_status, upload_time=solution.upload_time)
+        for solution in Solution.objects.exclude(solution_status=NOT_EVALUATED).iterator()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_auto_20210130_1119'),
+        ('competition', '0014_scoreboard_task_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreboardCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checkpoint_time', models.DateTimeField(unique=True)),
+                ('task_entries', models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VerdictEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solution_status', models.IntegerField(choices=[(1, 'Nieocenione'), (2, 'Poprawne'), (3, 'Niepoprawne'), (4, 'Błąd prezentacji'), (5, 'Błąd kompilacji'), (6, 'Błąd czasu wykonania'), (7, 'Przekroczono czas wykonania')])),
+                ('upload_time', models.DateTimeField()),
+                ('event_time', models.DateTimeField(auto_now_add=True)),
+                ('solution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='competition.solution')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='competition.task')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.team')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='verdictevent',
+            index=models.Index(fields=['upload_time', 'solution', 'id'], name='competition_upload__3e9ed8_idx'),
+        ),
+        migrations.RunPython(create_verdict_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:49
+
+from django.db import migrations, models
+
+
+def fill_solved_tasks(apps, schema_editor):
+    ScoreboardEntry = apps.get_model('competition', 'ScoreboardEntry')
+    ScoreboardTaskEntry = apps.get_model('competition', 'ScoreboardTaskEntry')
+    teams_solved_tasks = {}
+    for team_id, task_id in ScoreboardTaskEntry.objects.exclude(accepted_solution_time=None).values_list(
+            'team_id', 'task_id'):
+        teams_solved_tasks[team_id] = teams_solved_tasks.get(team_id, 0) | 1 << task_id
+    for scoreboard_entry in ScoreboardEntry.objects.filter(team_id__in=teams_solved_tasks):
+        solved_tasks = teams_solved_tasks[scoreboard_entry.team_id]
+        scoreboard_entry.solved_tasks = solved_tasks.to_bytes((solved_tasks.bit_length() + 7) // 8, 'little')
+        scoreboard_entry.save(update_fields=['solved_tasks'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0015_verdict_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoreboardentry',
+            name='solved_tasks',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(fill_solved_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.1.14 on 2026-10-18 14:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0016_scoreboard_solved_tasks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='modification_time',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0017_test_modification_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='judgequeueentry',
+            name='attempts_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0018_judge_queue_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoreboardcheckpoint',
+            name='events_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
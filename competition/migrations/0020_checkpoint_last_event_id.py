@@ -0,0 +1,22 @@
+# Generated by Django 3.1.14 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competition', '0019_checkpoint_events_count'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='scoreboardcheckpoint',
+            name='events_count',
+        ),
+        migrations.AddField(
+            model_name='scoreboardcheckpoint',
+            name='last_event_id',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
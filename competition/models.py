@@ -1,5 +1,7 @@
 
 
+import uuid
+
 from django.db import models
 
 
@@ -8,13 +10,26 @@ from users.models import Team
 
 
 class Task(models.Model):
+    class EvaluationPolicy(models.IntegerChoices):
+        RUN_ALL = 0, 'Wszystkie testy'
+        STOP_AT_FIRST_FAILURE = 1, 'Do pierwszego niezaliczonego testu'
+        TEST_GROUPS = 2, 'Grupy testów (niezaliczony test pomija resztę grupy)'
+
     description = models.CharField(max_length=1000)
+    evaluation_policy = models.IntegerField(choices=EvaluationPolicy.choices, default=EvaluationPolicy.RUN_ALL)
+    cpu_time_limit_in_seconds = models.FloatField(default=2)
+    wall_time_limit_in_seconds = models.FloatField(default=5)
+    memory_limit_in_megabytes = models.PositiveIntegerField(default=256)
 
 
 class Test(models.Model):
-    input = models.CharField(max_length=500)
-    output = models.CharField(max_length=500)
+    input = models.CharField(max_length=500, blank=True)
+    output = models.CharField(max_length=500, blank=True)
+    input_file = models.FileField(upload_to='tests', blank=True)  # zamiast input dla duzych danych
+    output_file = models.FileField(upload_to='tests', blank=True)  # zamiast output dla duzych danych
     task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    group = models.PositiveIntegerField(default=0)
+    modification_time = models.DateTimeField(auto_now=True)  # proces oceniajacy po nim wykrywa zmienione testy
 
 
 class Solution(models.Model):
@@ -36,6 +51,10 @@ class Solution(models.Model):
 
 class SolutionTestResult(models.Model):
     did_pass = models.BooleanField()
+    was_run = models.BooleanField(default=True)
+    cpu_time_in_seconds = models.FloatField(null=True, blank=True)
+    wall_time_in_seconds = models.FloatField(null=True, blank=True)
+    memory_usage_in_kilobytes = models.PositiveIntegerField(null=True, blank=True)
     solution = models.ForeignKey(Solution, on_delete=models.CASCADE)
     test = models.ForeignKey(Test, on_delete=models.CASCADE)
 
@@ -59,3 +78,78 @@ class Configuration(models.Model):
 
     def __str__(self):
         return "Configuration"
+
+
+class JudgeQueueEntry(models.Model):
+    solution = models.OneToOneField(Solution, on_delete=models.CASCADE)
+    enqueue_time = models.DateTimeField(auto_now_add=True)
+    claim_time = models.DateTimeField(null=True, blank=True)
+    attempts_count = models.PositiveIntegerField(default=0)  # nieudane proby oceny (wyjatek w procesie oceniajacym)
+
+    class Meta:
+        indexes = [models.Index(fields=['claim_time', 'enqueue_time'])]
+
+
+class VerdictCacheEntry(models.Model):
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    content_hash = models.CharField(max_length=64)
+    tests_hash = models.CharField(max_length=64)
+    solution = models.ForeignKey(Solution, on_delete=models.CASCADE)  # rozwiazanie, z ktorego kopiowany jest werdykt
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['task', 'content_hash', 'tests_hash'],
+                                               name='unique_verdict_cache_entry')]
+
+
+class ScoreboardEntry(models.Model):
+    # wynik zespolu aktualizowany przy kazdym werdykcie (competition/scoreboard.py)
+    team = models.OneToOneField(Team, on_delete=models.CASCADE)
+    correct_solutions_count = models.PositiveIntegerField(default=0)
+    penalty_time_in_seconds = models.PositiveIntegerField(default=0)
+    last_correct_solution_time = models.DateTimeField(null=True, blank=True)
+    # zbior rozwiazanych zadan - bit numer task.id jest ustawiony, jesli zadanie zostalo zaakceptowane
+    solved_tasks = models.BinaryField(default=b'')
+
+
+class ScoreboardTaskEntry(models.Model):
+    # wynik zespolu w jednym zadaniu; rozwiazania wyslane po zaakceptowaniu zadania nie sa liczone
+    team = models.ForeignKey(Team, on_delete=models.CASCADE)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    incorrect_solutions_count = models.PositiveIntegerField(default=0)
+    accepted_solution_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['team', 'task'], name='unique_scoreboard_task_entry')]
+
+
+class VerdictEvent(models.Model):
+    # dopisywany przy kazdym werdykcie i nigdy nie zmieniany; pozwala odtworzyc ranking z dowolnej chwili
+    solution = models.ForeignKey(Solution, on_delete=models.CASCADE)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    solution_status = models.IntegerField(choices=Solution.SolutionStatus.choices)
+    upload_time = models.DateTimeField()
+    event_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['upload_time', 'solution', 'id'])]
+
+
+class ScoreboardCheckpoint(models.Model):
+    # wyniki zespolow w zadaniach dla rozwiazan wyslanych do checkpoint_time - od nich zaczyna sie odtwarzanie
+    checkpoint_time = models.DateTimeField(unique=True)
+    task_entries = models.JSONField()
+    # najwiekszy identyfikator zdarzenia uwzglednionego w punkcie kontrolnym - zdarzenie sprzed checkpoint_time
+    # z wiekszym identyfikatorem oznacza werdykt zapisany rownolegle z odtwarzaniem
+    last_event_id = models.PositiveIntegerField(default=0)
+
+
+class RankingSnapshot(models.Model):
+    # ranking z chwili wylaczenia jego widocznosci, pokazywany zespolom do czasu ponownego wlaczenia
+    freeze_time = models.DateTimeField(unique=True)
+    ranking_entries = models.JSONField()
+
+
+class ScoreboardVersion(models.Model):
+    # zmieniana przy kazdej zmianie wynikow lub konfiguracji; procesy porownuja ja z wersja zapamietanego rankingu
+    version = models.UUIDField(default=uuid.uuid4)
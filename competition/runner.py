@@ -0,0 +1,162 @@
+import atexit
+import fcntl
+import io
+import marshal
+import os
+import queue
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+from . import forkserver
+
+RunLimits = namedtuple('RunLimits', ['cpu_time', 'wall_time', 'memory'])  # sekundy, sekundy, bajty
+RunResult = namedtuple('RunResult', ['exit_code', 'stderr', 'is_wall_time_exceeded', 'wall_time', 'cpu_time',
+                                     'memory_usage'])
+
+CHUNK_SIZE = 65536
+STDERR_LIMIT = 65536  # z wyjscia bledow zapamietywana jest tylko koncowka, w ktorej jest rodzaj bledu
+COMMUNICATE_GRACE_TIME = 1  # sekundy ponad limit czasu rzeczywistego, po ktorych wyjscie przestaje byc czytane
+
+__idle_fork_servers = queue.LifoQueue()
+__all_fork_servers = []
+
+
+def create_code_file(code):
+    # plik istnieje tylko w pamieci; po zapisie jest zablokowany, zeby rozwiazanie nie moglo podmienic kodu
+    # uruchamianego w kolejnych testach
+    code_fd = os.memfd_create('solution', os.MFD_CLOEXEC | os.MFD_ALLOW_SEALING)
+    try:
+        os.write(code_fd, marshal.dumps(code))
+        fcntl.fcntl(code_fd, fcntl.F_ADD_SEALS,
+                    fcntl.F_SEAL_SEAL | fcntl.F_SEAL_SHRINK | fcntl.F_SEAL_GROW | fcntl.F_SEAL_WRITE)
+    except OSError:
+        os.close(code_fd)
+        raise
+    return code_fd
+
+
+def run_solution(code_fd, solution_input, output_checker, limits):
+    # solution_input to plik binarny (przekazywany rozwiazaniu bezposrednio jako stdin) lub strumien w pamieci
+    fork_server = __acquire_fork_server()
+    try:
+        result = fork_server.run(code_fd, solution_input, output_checker, limits)
+    except (OSError, EOFError):
+        # szablon przestal dzialac - nastepne uruchomienie wystartuje nowy
+        fork_server.close()
+        raise
+    __idle_fork_servers.put(fork_server)
+    return result
+
+
+def __acquire_fork_server():
+    try:
+        return __idle_fork_servers.get_nowait()
+    except queue.Empty:
+        fork_server = ForkServer()
+        __all_fork_servers.append(fork_server)
+        return fork_server
+
+
+@atexit.register
+def __close_fork_servers():
+    for fork_server in __all_fork_servers:
+        fork_server.close()
+
+
+class ForkServer:
+    def __init__(self):
+        self.socket, server_socket = socket.socketpair()
+        self.process = subprocess.Popen([sys.executable, forkserver.__file__, str(server_socket.fileno())],
+                                        pass_fds=[server_socket.fileno()], stdin=subprocess.DEVNULL)
+        server_socket.close()
+
+    def run(self, code_fd, solution_input, output_checker, limits):
+        stdin_read, stdin_write = self.__create_stdin(solution_input)
+        stdout_read, stdout_write = os.pipe()
+        stderr_read, stderr_write = os.pipe()
+        try:
+            forkserver.send_message(self.socket, {'cpu_time_limit': limits.cpu_time, 'wall_time_limit': limits.wall_time,
+                                                  'memory_limit': limits.memory},
+                                    [stdin_read, stdout_write, stderr_write, code_fd])
+        finally:
+            if stdin_write is not None:
+                os.close(stdin_read)
+            os.close(stdout_write)
+            os.close(stderr_write)
+
+        pid = forkserver.receive_message(self.socket)[0]['pid']
+        stderr = self.__communicate(pid, solution_input, stdin_write, stdout_read, stderr_read, output_checker,
+                                    time.monotonic() + limits.wall_time + COMMUNICATE_GRACE_TIME)
+        response, _ = forkserver.receive_message(self.socket)
+        return RunResult(response['exit_code'], stderr.decode('utf-8', errors='replace'),
+                         response['is_wall_time_exceeded'], response['wall_time'], response['cpu_time'],
+                         response['memory_usage'])
+
+    @staticmethod
+    def __create_stdin(solution_input):
+        try:
+            return solution_input.fileno(), None
+        except (AttributeError, io.UnsupportedOperation):
+            return os.pipe()
+
+    def close(self):
+        self.socket.close()
+        self.process.wait()
+
+    @staticmethod
+    def __communicate(pid, solution_input, stdin_fd, stdout_fd, stderr_fd, output_checker, deadline):
+        stderr = bytearray()
+        with selectors.DefaultSelector() as selector:
+            input_chunk = b''
+            if stdin_fd is not None:
+                os.set_blocking(stdin_fd, False)
+                selector.register(stdin_fd, selectors.EVENT_WRITE)
+            selector.register(stdout_fd, selectors.EVENT_READ)
+            selector.register(stderr_fd, selectors.EVENT_READ)
+
+            while selector.get_map():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    # wyjscie trzyma otwarte proces, ktory opuscil grupe rozwiazania - dalsze czekanie nie ma sensu
+                    ForkServer.__kill(pid)
+                    for key in list(selector.get_map().values()):
+                        selector.unregister(key.fd)
+                        os.close(key.fd)
+                    break
+                for key, _ in selector.select(timeout):
+                    if key.fd == stdin_fd:
+                        if not input_chunk:
+                            input_chunk = solution_input.read(CHUNK_SIZE)
+                        try:
+                            input_chunk = input_chunk[os.write(stdin_fd, input_chunk):] if input_chunk else None
+                        except BrokenPipeError:
+                            input_chunk = None  # rozwiazanie nie czyta calego wejscia
+                        if input_chunk is None:
+                            selector.unregister(stdin_fd)
+                            os.close(stdin_fd)
+                        continue
+
+                    chunk = os.read(key.fd, CHUNK_SIZE)
+                    if not chunk:
+                        selector.unregister(key.fd)
+                        os.close(key.fd)
+                    elif key.fd == stderr_fd:
+                        stderr = (stderr + chunk)[-STDERR_LIMIT:]
+                    elif not output_checker.feed(chunk):
+                        # przekroczono limit wyjscia - nie ma sensu czekac na reszte
+                        ForkServer.__kill(pid)
+                        selector.unregister(stdout_fd)
+                        os.close(stdout_fd)
+        return bytes(stderr)
+
+    @staticmethod
+    def __kill(pid):
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,368 @@
+import datetime
+import time
+import uuid
+from collections import namedtuple
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import Team
+from .configuration import get_configuration
+from .models import Task, Solution, ScoreboardEntry, ScoreboardTaskEntry, RankingSnapshot, \
+    ScoreboardVersion, VerdictEvent, ScoreboardCheckpoint
+
+INCORRECT_SOLUTION_PENALTY = 1200  # 20 minut = 1200 sekund
+
+CachedRanking = namedtuple('CachedRanking', ['version', 'check_time', 'ranking_entries'])
+
+ranking_cache_statistics = {'hits': 0, 'misses': 0}
+
+__ranking_cache = {}  # czy ranking zamrozony -> CachedRanking
+
+
+def get_cached_ranking(configuration, is_frozen):
+    # wszystkie zapytania o ranking obsluguje jedno wyliczenie, dopoki nie zmieni sie wersja wynikow
+    cached_ranking = __ranking_cache.get(is_frozen)
+    if cached_ranking is not None and \
+            time.monotonic() - cached_ranking.check_time < settings.RANKING_CACHE_MAX_STALENESS:
+        ranking_cache_statistics['hits'] += 1
+        return cached_ranking
+
+    check_time = time.monotonic()
+    version = get_scoreboard_version()
+    if cached_ranking is not None and cached_ranking.version == version:
+        ranking_cache_statistics['hits'] += 1
+        cached_ranking = __ranking_cache[is_frozen] = cached_ranking._replace(check_time=check_time)
+        return cached_ranking
+
+    ranking_cache_statistics['misses'] += 1
+    if is_frozen:
+        ranking_entries = get_frozen_ranking_entries(configuration)
+    else:
+        ranking_entries = get_ranking_entries(configuration)
+    cached_ranking = __ranking_cache[is_frozen] = CachedRanking(version, check_time, ranking_entries)
+    return cached_ranking
+
+
+def get_scoreboard_version():
+    scoreboard_version, _ = ScoreboardVersion.objects.get_or_create(id=1)
+    return scoreboard_version.version
+
+
+def bump_scoreboard_version():
+    # nowa wersja jest widoczna dla innych procesow dopiero po zatwierdzeniu transakcji, ktora zmienila wyniki
+    ScoreboardVersion.objects.update_or_create(id=1, defaults={'version': uuid.uuid4()})
+
+
+def get_ranking_entries(configuration):
+    # aktualny ranking czytany z tabeli wynikow, bez przeliczania rozwiazan
+    scoreboard_entries = ScoreboardEntry.objects.all().select_related('team__team_as_user').order_by('team_id')
+    teams_task_entries = __group_task_entries(ScoreboardTaskEntry.objects.all())
+    tasks_ids = __get_tasks_ids()
+    return __sort_ranking_entries([
+        __create_ranking_entry(entry.team, entry, teams_task_entries.get(entry.team_id, {}), tasks_ids,
+                               configuration.competition_start_time)
+        for entry in scoreboard_entries])
+
+
+def get_frozen_ranking_entries(configuration):
+    # ranking z chwili wylaczenia jego widocznosci nie zmienia sie, wiec jest liczony raz i zapamietywany
+    ranking_snapshot = RankingSnapshot.objects.filter(freeze_time=configuration.ranking_visibility_change_time).first()
+    if ranking_snapshot is None:
+        ranking_snapshot = create_ranking_snapshot(configuration)
+    return ranking_snapshot.ranking_entries
+
+
+def create_ranking_snapshot(configuration):
+    with transaction.atomic():
+        delete_ranking_snapshot()
+        ranking_entries = get_historical_ranking_entries(configuration, configuration.ranking_visibility_change_time)
+        return RankingSnapshot.objects.create(freeze_time=configuration.ranking_visibility_change_time,
+                                              ranking_entries=ranking_entries)
+
+
+def delete_ranking_snapshot():
+    RankingSnapshot.objects.all().delete()
+
+
+def update_scoreboard(solution, previous_solution_status):
+    # wywolywane w transakcji, w ktorej zapisywany jest werdykt
+    if solution.solution_status == previous_solution_status:
+        return
+    bump_scoreboard_version()
+    __record_verdict_event(solution)
+    __update_ranking_snapshot(solution.upload_time)
+    if previous_solution_status != Solution.SolutionStatus.NOT_EVALUATED or \
+            solution.solution_status == Solution.SolutionStatus.CORRECT:
+        # zmiana wczesniejszego werdyktu lub zaakceptowanie zadania (ktore wyklucza z wyniku rozwiazania wyslane
+        # pozniej, ale ocenione wczesniej) - wynik zespolu liczony jest od nowa
+        rebuild_scoreboard(solution.team_id)
+        return
+
+    task_entry, _ = ScoreboardTaskEntry.objects.select_for_update().get_or_create(team_id=solution.team_id,
+                                                                                    task_id=solution.task_id)
+    if task_entry.accepted_solution_time is not None and solution.upload_time > task_entry.accepted_solution_time:
+        return  # rozwiazanie wyslane po zaakceptowaniu zadania nie zmienia wyniku
+    task_entry.incorrect_solutions_count += 1
+    task_entry.save(update_fields=['incorrect_solutions_count'])
+    is_updated = ScoreboardEntry.objects.filter(team_id=solution.team_id).update(
+        penalty_time_in_seconds=F('penalty_time_in_seconds') + INCORRECT_SOLUTION_PENALTY)
+    if not is_updated:
+        rebuild_scoreboard(solution.team_id)
+
+
+def rebuild_scoreboard(team_id=None):
+    teams_ids = Team.objects.all().values_list('id', flat=True)
+    solutions = Solution.objects.all()
+    scoreboard_entries = ScoreboardEntry.objects.all()
+    scoreboard_task_entries = ScoreboardTaskEntry.objects.all()
+    if team_id is not None:
+        teams_ids = teams_ids.filter(id=team_id)
+        solutions = solutions.filter(team_id=team_id)
+        scoreboard_entries = scoreboard_entries.filter(team_id=team_id)
+        scoreboard_task_entries = scoreboard_task_entries.filter(team_id=team_id)
+
+    with transaction.atomic():
+        bump_scoreboard_version()
+        __synchronize_verdict_events(team_id, solutions)
+        task_entries = __calculate_task_entries(solutions)
+        teams_task_entries = __group_task_entries(task_entries)
+        scoreboard_entries.delete()
+        scoreboard_task_entries.delete()
+        ScoreboardTaskEntry.objects.bulk_create(task_entries)
+        return len(ScoreboardEntry.objects.bulk_create([
+            __create_scoreboard_entry(team_id, teams_task_entries.get(team_id, {}).values())
+            for team_id in teams_ids]))
+
+
+def get_solved_tasks(team_id):
+    # zbior rozwiazanych zadan zespolu jako liczba (bit numer task.id) - czytany zawsze z bazy, bo werdykty
+    # zapisuje inny proces (runjudge), a pamiec podreczna nie jest wspolna dla procesow
+    solved_tasks = ScoreboardEntry.objects.filter(team_id=team_id).values_list('solved_tasks', flat=True).first()
+    return int.from_bytes(solved_tasks, 'little') if solved_tasks is not None else 0
+
+
+def is_task_solved(solved_tasks, task_id):
+    return solved_tasks >> task_id & 1 == 1
+
+
+def __update_ranking_snapshot(upload_time):
+    # rozwiazanie wyslane przed wylaczeniem widocznosci rankingu, ale ocenione pozniej, nalezy do zamrozonego rankingu
+    ranking_snapshot = RankingSnapshot.objects.filter(freeze_time__gte=upload_time).first()
+    if ranking_snapshot is not None:
+        configuration = get_configuration()
+        ranking_snapshot.ranking_entries = get_historical_ranking_entries(configuration,
+                                                                          ranking_snapshot.freeze_time)
+        ranking_snapshot.save(update_fields=['ranking_entries'])
+
+
+def get_historical_ranking_entries(configuration, ranking_time):
+    # ranking dla rozwiazan wyslanych do ranking_time, z ich obecnymi werdyktami
+    teams_task_entries = __group_task_entries(get_historical_task_entries(ranking_time))
+    tasks_ids = __get_tasks_ids()
+    ranking_entries = []
+    for team in Team.objects.all().select_related('team_as_user').order_by('id'):
+        team_task_entries = teams_task_entries.get(team.id, {})
+        scoreboard_entry = __create_scoreboard_entry(team.id, team_task_entries.values())
+        ranking_entries.append(__create_ranking_entry(team, scoreboard_entry, team_task_entries, tasks_ids,
+                                                      configuration.competition_start_time))
+    return __sort_ranking_entries(ranking_entries)
+
+
+def get_historical_task_entries(ranking_time):
+    # odtwarzanie zaczyna sie od ostatniego punktu kontrolnego, wiec jego koszt nie rosnie z dlugoscia zawodow
+    checkpoint = __get_valid_checkpoint(ranking_time)
+    verdict_events = VerdictEvent.objects.filter(upload_time__lte=ranking_time)
+    task_entries = {}
+    last_event_id = 0
+    if checkpoint is not None:
+        verdict_events = verdict_events.filter(upload_time__gt=checkpoint.checkpoint_time)
+        task_entries = __load_checkpoint(checkpoint)
+        last_event_id = checkpoint.last_event_id
+    verdict_events = verdict_events.order_by('upload_time', 'solution_id', 'id').values_list(
+        'solution_id', 'team_id', 'task_id', 'solution_status', 'upload_time', 'id')
+
+    next_checkpoint_time = __get_next_checkpoint_time(checkpoint.checkpoint_time if checkpoint is not None else None)
+    for _, solution_events in groupby(verdict_events.iterator(), key=lambda verdict_event: verdict_event[0]):
+        solution_events = list(solution_events)
+        # liczy sie tylko ostatni werdykt kazdego rozwiazania
+        _, team_id, task_id, solution_status, upload_time, _ = solution_events[-1]
+        while next_checkpoint_time is not None and next_checkpoint_time < upload_time:
+            __save_checkpoint(next_checkpoint_time, task_entries, last_event_id)
+            next_checkpoint_time = __get_next_checkpoint_time(next_checkpoint_time)
+        last_event_id = max(last_event_id, *(verdict_event[5] for verdict_event in solution_events))
+        __apply_solution(task_entries, team_id, task_id, solution_status, upload_time)
+    while next_checkpoint_time is not None and next_checkpoint_time <= ranking_time:
+        __save_checkpoint(next_checkpoint_time, task_entries, last_event_id)
+        next_checkpoint_time = __get_next_checkpoint_time(next_checkpoint_time)
+    return list(task_entries.values())
+
+
+def __get_valid_checkpoint(ranking_time):
+    # punkt kontrolny zapisany przez odtwarzanie, ktore nie widzialo rownoleglego werdyktu (zatwierdzonego po
+    # rozpoczeciu odtwarzania, a przed zapisaniem punktu), nie obejmuje zdarzenia z wiekszym identyfikatorem;
+    # wtedy odtwarzamy od poczatku, a nowe punkty kontrolne zastepuja nieaktualne
+    checkpoint = ScoreboardCheckpoint.objects.filter(checkpoint_time__lte=ranking_time).order_by(
+        '-checkpoint_time').first()
+    if checkpoint is not None and VerdictEvent.objects.filter(upload_time__lte=checkpoint.checkpoint_time,
+                                                              id__gt=checkpoint.last_event_id).exists():
+        return None
+    return checkpoint
+
+
+def __record_verdict_event(solution):
+    VerdictEvent.objects.create(solution=solution, team_id=solution.team_id, task_id=solution.task_id,
+                                solution_status=solution.solution_status, upload_time=solution.upload_time)
+    __delete_checkpoints(solution.upload_time)
+
+
+def __synchronize_verdict_events(team_id, solutions):
+    # werdykty zapisane z pominieciem procesu oceniajacego (panel administracyjny, dane przykladowe) nie maja
+    # zdarzen - dopisujemy je, zeby ranking historyczny zgadzal sie z obecnymi werdyktami rozwiazan
+    verdict_events = VerdictEvent.objects.all()
+    if team_id is not None:
+        verdict_events = verdict_events.filter(team_id=team_id)
+    # liczy sie ostatnie zdarzenie kazdego rozwiazania
+    last_solution_statuses = dict(verdict_events.order_by('solution_id', 'id').values_list('solution_id',
+                                                                                           'solution_status'))
+    missing_verdict_events = [
+        VerdictEvent(solution_id=solution_id, team_id=team_id, task_id=task_id, solution_status=solution_status,
+                     upload_time=upload_time)
+        for solution_id, team_id, task_id, solution_status, upload_time in solutions.values_list(
+            'id', 'team_id', 'task_id', 'solution_status', 'upload_time').iterator()
+        if last_solution_statuses.get(solution_id, Solution.SolutionStatus.NOT_EVALUATED) != solution_status]
+    if not missing_verdict_events:
+        return
+    VerdictEvent.objects.bulk_create(missing_verdict_events)
+    first_upload_time = min(verdict_event.upload_time for verdict_event in missing_verdict_events)
+    __delete_checkpoints(first_upload_time)
+    __update_ranking_snapshot(first_upload_time)
+
+
+def __delete_checkpoints(upload_time):
+    # punkty kontrolne nie uwzgledniaja werdyktu rozwiazania wyslanego przed nimi
+    ScoreboardCheckpoint.objects.filter(checkpoint_time__gte=upload_time).delete()
+
+
+def __get_next_checkpoint_time(checkpoint_time):
+    # punkty kontrolne sa co RANKING_CHECKPOINT_INTERVAL sekund, zawsze w tych samych chwilach (niezaleznie od
+    # pierwszego zdarzenia), wiec ponowne odtwarzanie zastepuje nieaktualne punkty; najnowszy musi byc starszy
+    # niz ten odstep, bo rozwiazania wyslane tuz przed nim moga jeszcze czekac na werdykt
+    checkpoint_interval = datetime.timedelta(seconds=settings.RANKING_CHECKPOINT_INTERVAL)
+    if checkpoint_time is None:
+        first_event = VerdictEvent.objects.order_by('upload_time').first()
+        if first_event is None:
+            return None
+        epoch = datetime.datetime.fromtimestamp(0, datetime.timezone.utc)
+        checkpoint_time = epoch + (first_event.upload_time - epoch) // checkpoint_interval * checkpoint_interval
+    next_checkpoint_time = checkpoint_time + checkpoint_interval
+    if next_checkpoint_time > timezone.now() - checkpoint_interval:
+        return None
+    return next_checkpoint_time
+
+
+def __save_checkpoint(checkpoint_time, task_entries, last_event_id):
+    serialized_task_entries = [
+        [task_entry.team_id, task_entry.task_id, task_entry.incorrect_solutions_count,
+         task_entry.accepted_solution_time.isoformat() if task_entry.accepted_solution_time is not None else None]
+        for task_entry in task_entries.values()]
+    ScoreboardCheckpoint.objects.update_or_create(checkpoint_time=checkpoint_time,
+                                                  defaults={'task_entries': serialized_task_entries,
+                                                            'last_event_id': last_event_id})
+
+
+def __load_checkpoint(checkpoint):
+    task_entries = {}
+    for team_id, task_id, incorrect_solutions_count, accepted_solution_time in checkpoint.task_entries:
+        task_entries[team_id, task_id] = ScoreboardTaskEntry(
+            team_id=team_id, task_id=task_id, incorrect_solutions_count=incorrect_solutions_count,
+            accepted_solution_time=datetime.datetime.fromisoformat(accepted_solution_time)
+            if accepted_solution_time is not None else None)
+    return task_entries
+
+
+def __calculate_task_entries(solutions):
+    # jedno przejscie po rozwiazaniach w kolejnosci wyslania, bez osobnych zapytan dla zespolow i zadan
+    task_entries = {}
+    solutions = solutions.exclude(solution_status=Solution.SolutionStatus.NOT_EVALUATED).order_by(
+        'upload_time', 'id').values_list('team_id', 'task_id', 'solution_status', 'upload_time')
+    for team_id, task_id, solution_status, upload_time in solutions.iterator():
+        __apply_solution(task_entries, team_id, task_id, solution_status, upload_time)
+    return list(task_entries.values())
+
+
+def __apply_solution(task_entries, team_id, task_id, solution_status, upload_time):
+    if solution_status == Solution.SolutionStatus.NOT_EVALUATED:
+        return
+    task_entry = task_entries.get((team_id, task_id))
+    if task_entry is None:
+        task_entry = task_entries[team_id, task_id] = ScoreboardTaskEntry(team_id=team_id, task_id=task_id)
+    if task_entry.accepted_solution_time is not None:
+        return  # rozwiazania wyslane po zaakceptowaniu zadania nie zmieniaja wyniku
+    if solution_status == Solution.SolutionStatus.CORRECT:
+        task_entry.accepted_solution_time = upload_time
+    else:
+        task_entry.incorrect_solutions_count += 1
+
+
+def __group_task_entries(task_entries):
+    teams_task_entries = {}
+    for task_entry in task_entries:
+        teams_task_entries.setdefault(task_entry.team_id, {})[task_entry.task_id] = task_entry
+    return teams_task_entries
+
+
+def __create_scoreboard_entry(team_id, task_entries):
+    # nierozwiazane zadania tez zwiekszaja czas - kazde niepoprawne rozwiazanie to 20 minut kary
+    accepted_solution_times = [task_entry.accepted_solution_time for task_entry in task_entries
+                               if task_entry.accepted_solution_time is not None]
+    incorrect_solutions_count = sum(task_entry.incorrect_solutions_count for task_entry in task_entries)
+    solved_tasks = sum(1 << task_entry.task_id for task_entry in task_entries
+                       if task_entry.accepted_solution_time is not None)
+    return ScoreboardEntry(team_id=team_id, correct_solutions_count=len(accepted_solution_times),
+                           penalty_time_in_seconds=incorrect_solutions_count * INCORRECT_SOLUTION_PENALTY,
+                           last_correct_solution_time=max(accepted_solution_times, default=None),
+                           solved_tasks=solved_tasks.to_bytes((solved_tasks.bit_length() + 7) // 8, 'little'))
+
+
+def __get_tasks_ids():
+    return list(Task.objects.all().order_by('id').values_list('id', flat=True))
+
+
+def __create_ranking_entry(team, scoreboard_entry, team_task_entries, tasks_ids, competition_start_time):
+    total_time = __calculate_team_time(scoreboard_entry, competition_start_time)
+    return {'team_username': team.team_as_user.username,
+            'correct_solutions': scoreboard_entry.correct_solutions_count,
+            'time': total_time, 'formatted_time': __format_time(total_time),
+            'task_entries': [__create_ranking_task_entry(team_task_entries.get(task_id), competition_start_time)
+                             for task_id in tasks_ids]}
+
+
+def __create_ranking_task_entry(task_entry, competition_start_time):
+    if task_entry is None:
+        return {'incorrect_solutions': 0, 'accepted_time': None}
+    accepted_time = None
+    if task_entry.accepted_solution_time is not None:
+        accepted_time = __format_time((task_entry.accepted_solution_time - competition_start_time).seconds)
+    return {'incorrect_solutions': task_entry.incorrect_solutions_count, 'accepted_time': accepted_time}
+
+
+def __calculate_team_time(scoreboard_entry, competition_start_time):
+    if scoreboard_entry.correct_solutions_count > 0:
+        time_to_last_correct_solution = scoreboard_entry.last_correct_solution_time - competition_start_time
+        return time_to_last_correct_solution.seconds + scoreboard_entry.penalty_time_in_seconds
+    return scoreboard_entry.penalty_time_in_seconds
+
+
+def __sort_ranking_entries(ranking_entries):
+    ranking_entries.sort(key=lambda entry: (-entry['correct_solutions'], entry['time']))
+    return ranking_entries
+
+
+def __format_time(time):
+    hours = time // 3600
+    minutes = time // 60 % 60
+    return "{}:{:02d}".format(hours, minutes)
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.signals import request_started, request_finished
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from users.models import Team
+from .configuration import start_request_memo, clear_request_memo, invalidate_configuration, invalidate_tasks
+from .export import export_ranking
+from .models import Task, Test, Solution, Configuration, VerdictCacheEntry, ScoreboardEntry, ScoreboardCheckpoint, \
+    ScoreboardVersion
+from .scoreboard import bump_scoreboard_version
+
+
+@receiver([post_save, post_delete], sender=Test)
+def invalidate_test_verdict_cache(sender, instance, **kwargs):
+    VerdictCacheEntry.objects.filter(task_id=instance.task_id).delete()
+
+
+@receiver(post_save, sender=Task)
+def invalidate_task_verdict_cache(sender, instance, **kwargs):
+    VerdictCacheEntry.objects.filter(task=instance).delete()
+
+
+@receiver([post_save, post_delete], sender=Task)
+def invalidate_tasks_cache(sender, instance, **kwargs):
+    invalidate_tasks()
+    transaction.on_commit(invalidate_tasks)
+
+
+@receiver(post_save, sender=Team)
+def create_scoreboard_entry(sender, instance, created, **kwargs):
+    if created:
+        ScoreboardEntry.objects.get_or_create(team=instance)
+        bump_scoreboard_version()
+
+
+@receiver(post_save, sender=Configuration)
+def invalidate_ranking_cache(sender, instance, **kwargs):
+    # zmiana widocznosci rankingu lub czasu rozpoczecia zawodow zmienia wyswietlane wyniki
+    bump_scoreboard_version()
+
+
+@receiver([post_save, post_delete], sender=Configuration)
+def invalidate_configuration_cache(sender, instance, **kwargs):
+    # inne procesy rozpoznaja zmiane po wersji wynikow, tutaj czyszczona jest tez konfiguracja zapamietana w zapytaniu
+    invalidate_configuration()
+
+
+@receiver(request_started)
+def start_configuration_memo(sender, **kwargs):
+    start_request_memo()
+
+
+@receiver(request_finished)
+def clear_configuration_memo(sender, **kwargs):
+    clear_request_memo()
+
+
+@receiver(post_delete, sender=Solution)
+def invalidate_scoreboard_checkpoints(sender, instance, **kwargs):
+    # razem z rozwiazaniem znikaja jego werdykty, wiec pozniejsze punkty kontrolne sa nieaktualne
+    ScoreboardCheckpoint.objects.filter(checkpoint_time__gte=instance.upload_time).delete()
+
+
+@receiver(post_save, sender=ScoreboardVersion)
+def schedule_ranking_export(sender, instance, **kwargs):
+    # pliki sa zapisywane dopiero po zatwierdzeniu zmian, zeby inne procesy czytaly juz nowe wyniki
+    if settings.RANKING_EXPORT_DIR is not None:
+        transaction.on_commit(export_ranking)
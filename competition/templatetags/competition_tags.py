@@ -1,8 +1,10 @@
 from django import template
 
+from competition.middleware import get_user_roles
+
 register = template.Library()
 
 
 @register.filter(name='has_group')
 def has_group(user, group):
-    return user.groups.filter(name=group).exists()
+    return get_user_roles(user).has_group(group)
@@ -1,10 +1,31 @@
 from django.contrib.auth.models import User
-from django.test import TestCase, Client
+from django.core.files.base import ContentFile
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from competition.models import Task, Solution, Configuration
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+
+from competition.judge import claim_next_job, enqueue_solution, judge_solution, verdict_cache_statistics, TestResult, \
+    get_task_tests, judge_job, run_pending_jobs
+from competition.judge import __reduce_test_results as reduce_test_results
+from competition.checker import OutputChecker
+from competition.configuration import get_configuration, get_tasks, start_request_memo, clear_request_memo
+from competition.export import export_ranking
+from competition.warmup import warm_up, warm_up_judge
+from competition.models import Task, Test, Solution, SolutionTestResult, Configuration, JudgeQueueEntry, \
+    ScoreboardEntry, RankingSnapshot, ScoreboardCheckpoint, VerdictEvent
+from competition.scoreboard import rebuild_scoreboard, create_ranking_snapshot, get_cached_ranking, \
+    bump_scoreboard_version, ranking_cache_statistics, get_ranking_entries, get_historical_ranking_entries, \
+    get_solved_tasks, is_task_solved
 from competition.views import __get_team_tasks as get_team_tasks
-from competition.views import __calculate_total_time as calculate_total_time
 from users.models import Team
 
 
@@ -38,6 +59,7 @@ class TestFunctionGetTeamTasks(TestCase):
             solution_status = Solution.SolutionStatus.CORRECT if count % 2 == 0 else Solution.SolutionStatus.PRESENTATION_ERROR
             Solution.objects.create(team=self.team, task=task, content='Przykładowe rozwiązanie',
                                     upload_time=timezone.now(), solution_status=solution_status)
+        rebuild_scoreboard()
 
         tasks_with_statuses, are_all_finished = get_team_tasks(self.team)
         for count, task_with_status in enumerate(tasks_with_statuses):
@@ -52,6 +74,7 @@ class TestFunctionGetTeamTasks(TestCase):
         for task in self.tasks:
             Solution.objects.create(team=self.team, task=task, content='Przykładowe rozwiązanie',
                                     upload_time=timezone.now(), solution_status=Solution.SolutionStatus.CORRECT)
+        rebuild_scoreboard()
 
         tasks_with_statuses, are_all_finished = get_team_tasks(self.team)
 
@@ -64,6 +87,7 @@ class TestFunctionGetTeamTasks(TestCase):
         for task in self.tasks:
             Solution.objects.create(team=self.team, task=task, content='Przykładowe rozwiązanie',
                                     upload_time=timezone.now(), solution_status=Solution.SolutionStatus.INCORRECT)
+        rebuild_scoreboard()
 
         tasks_with_statuses, are_all_finished = get_team_tasks(self.team)
 
@@ -89,7 +113,7 @@ class TestCalculateTotalTime(TestCase):
         )
         self.team.save()
 
-        Configuration.objects.create(participants_limit=50, competition_start_time=timezone.now())
+        self.configuration = Configuration.objects.create(participants_limit=50, competition_start_time=timezone.now())
 
         self.tasks = [
             Task.objects.create(description="Zadanie 1"),
@@ -99,6 +123,9 @@ class TestCalculateTotalTime(TestCase):
             Task.objects.create(description="Zadanie 5"),
         ]
 
+    def __get_total_time(self):
+        ranking_entry, = get_ranking_entries(self.configuration)
+        return ranking_entry['time'], ranking_entry['correct_solutions']
 
     def test_all_solutions_incorrect(self):
         for num, task in enumerate(self.tasks):
@@ -107,8 +134,8 @@ class TestCalculateTotalTime(TestCase):
                                     solution_status=Solution.SolutionStatus.INCORRECT
                                     )
 
-        team_solutions = Solution.objects.filter(team=self.team)
-        time, correct_solutions_count = calculate_total_time(team_solutions)
+        rebuild_scoreboard(self.team.id)
+        time, correct_solutions_count = self.__get_total_time()
 
         self.assertEquals(0, correct_solutions_count)
         self.assertEquals(6000, time)
@@ -121,16 +148,16 @@ class TestCalculateTotalTime(TestCase):
                                     solution_status=Solution.SolutionStatus.CORRECT
                                     )
 
-        team_solutions = Solution.objects.filter(team=self.team)
-        time, correct_solutions_count = calculate_total_time(team_solutions)
+        rebuild_scoreboard(self.team.id)
+        time, correct_solutions_count = self.__get_total_time()
 
         self.assertEquals(5, correct_solutions_count)
         self.assertEquals(3000, time)
 
 
     def test_zero_solutions(self):
-        team_solutions = Solution.objects.filter(team=self.team)
-        time, correct_solutions_count = calculate_total_time(team_solutions)
+        rebuild_scoreboard(self.team.id)
+        time, correct_solutions_count = self.__get_total_time()
 
         self.assertEquals(0, correct_solutions_count)
         self.assertEquals(0, time)
@@ -148,8 +175,749 @@ class TestCalculateTotalTime(TestCase):
                                         solution_status=Solution.SolutionStatus.INCORRECT
                                         )
 
-        team_solutions = Solution.objects.filter(team=self.team)
-        time, correct_solutions_count = calculate_total_time(team_solutions)
+        rebuild_scoreboard(self.team.id)
+        time, correct_solutions_count = self.__get_total_time()
 
         self.assertEquals(3, correct_solutions_count)
         self.assertEquals(5400, time)
+
+
+class TestClaimNextJob(TestCase):
+    def setUp(self):
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Zadanie 1")
+
+    def __create_solution(self):
+        return Solution.objects.create(team=self.team, task=self.task, content="print(5)",
+                                       upload_time=timezone.now())
+
+    def test_empty_queue(self):
+        self.assertIsNone(claim_next_job())
+
+    def test_jobs_claimed_in_enqueue_order(self):
+        first_solution = self.__create_solution()
+        second_solution = self.__create_solution()
+        enqueue_solution(first_solution)
+        enqueue_solution(second_solution)
+
+        self.assertEquals(first_solution.id, claim_next_job().solution_id)
+        self.assertEquals(second_solution.id, claim_next_job().solution_id)
+        self.assertIsNone(claim_next_job())
+
+    def test_stale_job_is_claimed_again(self):
+        enqueue_solution(self.__create_solution())
+        claim_next_job()
+        JudgeQueueEntry.objects.update(claim_time=timezone.now() - datetime.timedelta(hours=1))
+
+        self.assertIsNotNone(claim_next_job())
+
+
+class TestReduceTestResults(TestCase):
+    def test_all_tests_passed(self):
+        test_results = [TestResult.OKAY, TestResult.OKAY, TestResult.OKAY]
+        self.assertEquals(Solution.SolutionStatus.CORRECT, reduce_test_results(test_results))
+
+    def test_first_failed_test_decides(self):
+        test_results = [TestResult.OKAY, TestResult.PRESENTATION_ERROR, TestResult.RUNTIME_ERROR]
+        self.assertEquals(Solution.SolutionStatus.PRESENTATION_ERROR, reduce_test_results(test_results))
+        self.assertEquals(Solution.SolutionStatus.RUNTIME_ERROR, reduce_test_results(reversed(test_results)))
+
+
+@override_settings(JUDGE_TEST_WORKERS=1)
+class TestJudgeSolution(TestCase):
+    def setUp(self):
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Wypisz liczbę")
+        self.tests = [
+            Test.objects.create(task=self.task, input=r'1', output=r'1', group=1),
+            Test.objects.create(task=self.task, input=r'2', output=r'2', group=1),
+            Test.objects.create(task=self.task, input=r'5', output=r'5', group=2),
+            Test.objects.create(task=self.task, input=r'6', output=r'6', group=2),
+        ]
+        self.solution = Solution.objects.create(team=self.team, task=self.task, content="print(5)",
+                                                upload_time=timezone.now())
+
+    def __get_run_tests(self):
+        return list(SolutionTestResult.objects.filter(solution=self.solution, was_run=True)
+                    .order_by('test').values_list('test', flat=True))
+
+    def test_run_all(self):
+        status = judge_solution(self.solution)
+
+        self.assertEquals(Solution.SolutionStatus.INCORRECT, status)
+        self.assertEquals([test.id for test in self.tests], self.__get_run_tests())
+
+    def test_stop_at_first_failure(self):
+        self.task.evaluation_policy = Task.EvaluationPolicy.STOP_AT_FIRST_FAILURE
+        self.task.save()
+
+        status = judge_solution(self.solution)
+
+        self.assertEquals(Solution.SolutionStatus.INCORRECT, status)
+        self.assertEquals([self.tests[0].id], self.__get_run_tests())
+        self.assertEquals(4, SolutionTestResult.objects.filter(solution=self.solution).count())
+
+    def test_test_groups(self):
+        self.task.evaluation_policy = Task.EvaluationPolicy.TEST_GROUPS
+        self.task.save()
+
+        status = judge_solution(self.solution)
+
+        self.assertEquals(Solution.SolutionStatus.INCORRECT, status)
+        self.assertEquals([self.tests[0].id, self.tests[2].id, self.tests[3].id], self.__get_run_tests())
+
+    def test_compilation_error_skips_all_tests(self):
+        self.solution.content = "for in range(5)"
+        self.solution.save()
+
+        status = judge_solution(self.solution)
+
+        self.assertEquals(Solution.SolutionStatus.COMPILATION_ERROR, status)
+        self.assertEquals([], self.__get_run_tests())
+        self.assertEquals(4, SolutionTestResult.objects.filter(solution=self.solution).count())
+
+    def test_compiler_stack_overflow_is_runtime_error(self):
+        for content in ['1' + '+1' * 100000, '-' * 100000 + '1']:
+            self.solution.content = content
+            self.solution.save()
+
+            status = judge_solution(self.solution)
+
+            self.assertEquals(Solution.SolutionStatus.RUNTIME_ERROR, status)
+            self.assertEquals([], self.__get_run_tests())
+
+    def test_queries_do_not_depend_on_tests_count(self):
+        judge_solution(Solution.objects.create(team=self.team, task=self.task, content="print(4)",
+                                               upload_time=timezone.now()))
+        with CaptureQueriesContext(connection) as few_tests_queries:
+            judge_solution(self.solution)
+        for number in range(10):
+            Test.objects.create(task=self.task, input=str(number), output=str(number))
+        get_task_tests(self.task)
+        solution = Solution.objects.create(team=self.solution.team, task=self.task, content=self.solution.content,
+                                           upload_time=timezone.now())
+        with CaptureQueriesContext(connection) as many_tests_queries:
+            judge_solution(solution)
+
+        self.assertEquals(len(few_tests_queries), len(many_tests_queries))
+        self.assertEquals(14, SolutionTestResult.objects.filter(solution=solution).count())
+
+    def test_changed_test_is_reloaded(self):
+        judge_solution(self.solution)
+        self.tests[0].output = '5'
+        self.tests[0].save()
+        solution = Solution.objects.create(team=self.team, task=self.task, content="print(5)",
+                                           upload_time=timezone.now())
+
+        judge_solution(solution)
+
+        self.assertTrue(SolutionTestResult.objects.get(solution=solution, test=self.tests[0]).did_pass)
+        with self.assertNumQueries(1):
+            get_task_tests(self.task)
+
+    def test_cpu_time_limit_exceeded(self):
+        self.task.cpu_time_limit_in_seconds = 0.5
+        self.task.evaluation_policy = Task.EvaluationPolicy.STOP_AT_FIRST_FAILURE
+        self.task.save()
+        self.solution.content = "while True:\n    pass"
+        self.solution.save()
+
+        status = judge_solution(self.solution)
+
+        test_result = SolutionTestResult.objects.get(solution=self.solution, test=self.tests[0])
+        self.assertEquals(Solution.SolutionStatus.TIME_EXCEEDED_ERROR, status)
+        self.assertGreater(test_result.cpu_time_in_seconds, 0.5)
+
+    def test_wall_time_limit_exceeded(self):
+        self.task.wall_time_limit_in_seconds = 0.5
+        self.task.evaluation_policy = Task.EvaluationPolicy.STOP_AT_FIRST_FAILURE
+        self.task.save()
+        self.solution.content = "import time\ntime.sleep(10)"
+        self.solution.save()
+
+        status = judge_solution(self.solution)
+
+        test_result = SolutionTestResult.objects.get(solution=self.solution, test=self.tests[0])
+        self.assertEquals(Solution.SolutionStatus.TIME_EXCEEDED_ERROR, status)
+        self.assertLess(test_result.wall_time_in_seconds, 5)
+
+    def test_forked_process_does_not_block_judge(self):
+        self.task.wall_time_limit_in_seconds = 2
+        self.task.evaluation_policy = Task.EvaluationPolicy.STOP_AT_FIRST_FAILURE
+        self.task.save()
+        self.solution.content = "import os, time\nif os.fork() == 0:\n    time.sleep(60)\nprint(input())"
+        self.solution.save()
+
+        start_time = time.monotonic()
+        status = judge_solution(self.solution)
+
+        self.assertEquals(Solution.SolutionStatus.CORRECT, status)
+        self.assertLess(time.monotonic() - start_time, 10)
+
+    def test_process_leaving_solution_group_does_not_block_judge(self):
+        self.task.wall_time_limit_in_seconds = 1
+        self.task.evaluation_policy = Task.EvaluationPolicy.STOP_AT_FIRST_FAILURE
+        self.task.save()
+        self.solution.content = \
+            "import os, time\nif os.fork() == 0:\n    os.setsid()\n    time.sleep(10)\nprint(input())"
+        self.solution.save()
+        Test.objects.exclude(id=self.tests[0].id).delete()
+
+        start_time = time.monotonic()
+        judge_solution(self.solution)
+
+        self.assertLess(time.monotonic() - start_time, 5)
+
+    def test_memory_limit_exceeded(self):
+        self.task.memory_limit_in_megabytes = 128
+        self.task.save()
+        self.solution.content = "data = bytearray(1024 * 1024 * 1024)"
+        self.solution.save()
+
+        self.assertEquals(Solution.SolutionStatus.RUNTIME_ERROR, judge_solution(self.solution))
+
+
+class TestVerdictCache(TestCase):
+    def setUp(self):
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Wypisz liczbę")
+        self.test = Test.objects.create(task=self.task, input=r'5', output=r'5')
+
+    def __judge(self, content):
+        solution = Solution.objects.create(team=self.team, task=self.task, content=content,
+                                           upload_time=timezone.now())
+        hits_before = verdict_cache_statistics['hits']
+        judge_solution(solution)
+        return solution, verdict_cache_statistics['hits'] > hits_before
+
+    def test_identical_solution_is_not_run_again(self):
+        first_solution, is_first_cached = self.__judge("print(input())")
+        second_solution, is_second_cached = self.__judge("print(input())")
+
+        self.assertFalse(is_first_cached)
+        self.assertTrue(is_second_cached)
+        self.assertEquals(Solution.SolutionStatus.CORRECT, second_solution.solution_status)
+        self.assertTrue(SolutionTestResult.objects.get(solution=second_solution).did_pass)
+
+    def test_changed_test_invalidates_cache(self):
+        self.__judge("print(input())")
+        self.test.output = r'6'
+        self.test.save()
+
+        solution, is_cached = self.__judge("print(input())")
+
+        self.assertFalse(is_cached)
+        self.assertEquals(Solution.SolutionStatus.INCORRECT, solution.solution_status)
+
+
+class TestScoreboard(TestCase):
+    def setUp(self):
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Wypisz liczbę")
+        Test.objects.create(task=self.task, input=r'5', output=r'5')
+
+    def __judge(self, content, minutes):
+        solution = Solution.objects.create(team=self.team, task=self.task, content=content,
+                                           upload_time=timezone.now() + timezone.timedelta(minutes=minutes))
+        judge_solution(solution)
+        return solution
+
+    def __get_scoreboard_entry(self):
+        scoreboard_entry = ScoreboardEntry.objects.get(team=self.team)
+        return (scoreboard_entry.correct_solutions_count, scoreboard_entry.penalty_time_in_seconds,
+                scoreboard_entry.last_correct_solution_time)
+
+    def test_job_claimed_again_is_judged_once(self):
+        solution = Solution.objects.create(team=self.team, task=self.task, content="print(4)",
+                                           upload_time=timezone.now())
+        enqueue_solution(solution)
+        stale_job = claim_next_job()
+        JudgeQueueEntry.objects.update(claim_time=timezone.now() - datetime.timedelta(hours=1))
+        stale_job.claim_time = JudgeQueueEntry.objects.get().claim_time
+        job = claim_next_job()  # zadanie przejmuje drugi proces oceniajacy
+
+        judge_job(job)
+        judge_job(stale_job)
+
+        self.assertEquals((0, 1200, None), self.__get_scoreboard_entry())
+        self.assertEquals(1, VerdictEvent.objects.filter(solution=solution).count())
+        self.assertEquals(0, JudgeQueueEntry.objects.count())
+
+    def test_job_with_lost_claim_does_not_save_verdict(self):
+        solution = Solution.objects.create(team=self.team, task=self.task, content="print(4)",
+                                           upload_time=timezone.now())
+        enqueue_solution(solution)
+        stale_job = claim_next_job()
+        JudgeQueueEntry.objects.update(claim_time=timezone.now() - datetime.timedelta(hours=1))
+        stale_job.claim_time = JudgeQueueEntry.objects.get().claim_time
+        claim_next_job()
+
+        judge_job(stale_job)
+
+        solution.refresh_from_db()
+        self.assertEquals(Solution.SolutionStatus.NOT_EVALUATED, solution.solution_status)
+        self.assertEquals((0, 0, None), self.__get_scoreboard_entry())
+
+    def test_new_team_has_empty_scoreboard_entry(self):
+        self.assertEquals((0, 0, None), self.__get_scoreboard_entry())
+
+    def test_verdicts_update_scoreboard_entry(self):
+        self.__judge("print(4)", 1)
+        correct_solution = self.__judge("print(input())", 2)
+        self.__judge("print(", 3)
+
+        # rozwiazanie wyslane po zaakceptowaniu zadania nie zwieksza czasu
+        self.assertEquals((1, 1200, correct_solution.upload_time), self.__get_scoreboard_entry())
+
+    def test_solution_sent_before_acceptance_but_judged_later_is_counted(self):
+        incorrect_solution = Solution.objects.create(team=self.team, task=self.task, content="print(4)",
+                                                     upload_time=timezone.now())
+        correct_solution = self.__judge("print(input())", 2)
+
+        judge_solution(incorrect_solution)
+
+        self.assertEquals((1, 1200, correct_solution.upload_time), self.__get_scoreboard_entry())
+
+    def test_rebuild_matches_incremental_updates(self):
+        self.__judge("print(4)", 1)
+        self.__judge("print(input())", 2)
+        incrementally_updated_entry = self.__get_scoreboard_entry()
+        ScoreboardEntry.objects.all().delete()
+
+        rebuild_scoreboard()
+
+        self.assertEquals(incrementally_updated_entry, self.__get_scoreboard_entry())
+
+    def test_changed_verdict_recalculates_scoreboard_entry(self):
+        solution = self.__judge("print(input())", 1)
+        solution.solution_status = Solution.SolutionStatus.CORRECT
+        Solution.objects.filter(id=solution.id).update(content="print(4)")
+        solution.content = "print(4)"
+
+        judge_solution(solution)
+
+        self.assertEquals((0, 1200, None), self.__get_scoreboard_entry())
+
+    def test_correct_verdict_updates_solved_tasks(self):
+        self.assertFalse(is_task_solved(get_solved_tasks(self.team.id), self.task.id))
+        self.__judge("print(4)", 1)
+        self.assertFalse(is_task_solved(get_solved_tasks(self.team.id), self.task.id))
+
+        self.__judge("print(input())", 2)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(is_task_solved(get_solved_tasks(self.team.id), self.task.id))
+
+    def test_solved_tasks_are_not_cached_between_processes(self):
+        self.__judge("print(input())", 1)
+        self.assertTrue(is_task_solved(get_solved_tasks(self.team.id), self.task.id))
+
+        # zmiana zapisana przez inny proces (np. runjudge) jest widoczna od razu
+        ScoreboardEntry.objects.filter(team=self.team).update(solved_tasks=b'')
+
+        self.assertFalse(is_task_solved(get_solved_tasks(self.team.id), self.task.id))
+
+    def test_verdict_of_solution_sent_before_freeze_updates_snapshot(self):
+        configuration = Configuration.objects.create(participants_limit=50, competition_start_time=timezone.now(),
+                                                     ranking_visibility=Configuration.RankingVisibility.INVISIBLE,
+                                                     ranking_visibility_change_time=timezone.now() +
+                                                     timezone.timedelta(minutes=5))
+        create_ranking_snapshot(configuration)
+
+        self.__judge("print(input())", 1)
+        self.__judge("print(4)", 10)
+
+        ranking_entry, = RankingSnapshot.objects.get().ranking_entries
+        self.assertEquals(1, ranking_entry['correct_solutions'])
+        self.assertEquals(0, ranking_entry['time'] // 1200)
+
+
+class TestRankingCache(TestCase):
+    def setUp(self):
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Wypisz liczbę")
+        Test.objects.create(task=self.task, input=r'5', output=r'5')
+        self.configuration = Configuration.objects.create(participants_limit=50,
+                                                          competition_start_time=timezone.now())
+
+    def __get_ranking(self):
+        misses_before = ranking_cache_statistics['misses']
+        ranking_entries = get_cached_ranking(self.configuration, False).ranking_entries
+        return ranking_entries, ranking_cache_statistics['misses'] > misses_before
+
+    def test_unchanged_ranking_is_served_from_cache(self):
+        self.__get_ranking()
+
+        with CaptureQueriesContext(connection) as queries:
+            _, is_miss = self.__get_ranking()
+
+        self.assertFalse(is_miss)
+        self.assertEquals(1, len(queries))
+
+    def test_verdict_invalidates_cache(self):
+        self.__get_ranking()
+        solution = Solution.objects.create(team=self.team, task=self.task, content="print(input())",
+                                           upload_time=timezone.now())
+        judge_solution(solution)
+
+        (ranking_entry,), is_miss = self.__get_ranking()
+
+        self.assertTrue(is_miss)
+        self.assertEquals(1, ranking_entry['correct_solutions'])
+
+    def test_configuration_change_invalidates_cache(self):
+        self.__get_ranking()
+        self.configuration.save()
+
+        _, is_miss = self.__get_ranking()
+
+        self.assertTrue(is_miss)
+
+    @override_settings(RANKING_CACHE_MAX_STALENESS=60)
+    def test_version_is_not_checked_within_staleness_window(self):
+        self.__get_ranking()
+        bump_scoreboard_version()
+
+        with CaptureQueriesContext(connection) as queries:
+            _, is_miss = self.__get_ranking()
+
+        self.assertFalse(is_miss)
+        self.assertEquals(0, len(queries))
+
+
+@override_settings(RANKING_CHECKPOINT_INTERVAL=600)
+class TestScoreboardHistory(TestCase):
+    def setUp(self):
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Wypisz liczbę")
+        Test.objects.create(task=self.task, input=r'5', output=r'5')
+        self.start = timezone.now() - timezone.timedelta(hours=2)
+        self.configuration = Configuration.objects.create(participants_limit=50, competition_start_time=self.start)
+
+    def __judge(self, content, minutes):
+        solution = Solution.objects.create(team=self.team, task=self.task, content=content,
+                                           upload_time=self.start + timezone.timedelta(minutes=minutes))
+        judge_solution(solution)
+        return solution
+
+    def __get_ranking_entry(self, minutes):
+        ranking_entry, = get_historical_ranking_entries(self.configuration,
+                                                        self.start + timezone.timedelta(minutes=minutes))
+        return ranking_entry['correct_solutions'], ranking_entry['time']
+
+    def test_ranking_at_different_times(self):
+        self.__judge("print(4)", 10)
+        self.__judge("print(input())", 30)
+
+        self.assertEquals((0, 0), self.__get_ranking_entry(5))
+        self.assertEquals((0, 1200), self.__get_ranking_entry(20))
+        self.assertEquals((1, 30 * 60 + 1200), self.__get_ranking_entry(40))
+
+    def test_checkpoints_give_the_same_ranking(self):
+        self.__judge("print(4)", 10)
+        self.__judge("print(input())", 50)
+        self.__judge("print(4)", 70)
+
+        ranking_without_checkpoints = self.__get_ranking_entry(100)
+        self.assertTrue(ScoreboardCheckpoint.objects.exists())
+
+        self.assertEquals(ranking_without_checkpoints, self.__get_ranking_entry(100))
+        self.assertEquals((0, 1200), self.__get_ranking_entry(40))
+
+    def test_late_verdict_invalidates_checkpoints(self):
+        self.__judge("print(input())", 50)
+        self.__get_ranking_entry(100)
+        self.assertTrue(ScoreboardCheckpoint.objects.exists())
+
+        self.__judge("print(4)", 25)
+
+        self.assertFalse(ScoreboardCheckpoint.objects.exists())
+        self.assertEquals((1, 50 * 60 + 1200), self.__get_ranking_entry(100))
+
+    def test_checkpoint_missing_concurrent_verdict_is_not_used(self):
+        self.__judge("print(input())", 50)
+        solution = Solution.objects.create(team=self.team, task=self.task, content="print(4)",
+                                           upload_time=self.start + timezone.timedelta(minutes=25),
+                                           solution_status=Solution.SolutionStatus.INCORRECT)
+        self.__get_ranking_entry(100)
+        self.assertTrue(ScoreboardCheckpoint.objects.exists())
+        # werdykt zatwierdzony po odczytaniu zdarzen przez odtwarzanie, ale przed zapisaniem punktow kontrolnych
+        VerdictEvent.objects.create(solution=solution, team=self.team, task=self.task,
+                                    solution_status=solution.solution_status, upload_time=solution.upload_time)
+
+        self.assertEquals((0, 1200), self.__get_ranking_entry(40))
+        self.assertEquals((1, 50 * 60 + 1200), self.__get_ranking_entry(100))
+        for checkpoint in ScoreboardCheckpoint.objects.all():
+            self.assertFalse(VerdictEvent.objects.filter(upload_time__lte=checkpoint.checkpoint_time,
+                                                         id__gt=checkpoint.last_event_id).exists())
+
+    def test_current_ranking_matches_scoreboard(self):
+        self.__judge("print(4)", 10)
+        solution = self.__judge("print(input())", 20)
+        Solution.objects.filter(id=solution.id).update(content="print(4)")
+        solution.content = "print(4)"
+        judge_solution(solution)
+
+        self.assertEquals(get_ranking_entries(self.configuration),
+                          get_historical_ranking_entries(self.configuration, timezone.now()))
+
+    def test_rebuild_records_verdicts_saved_without_judge(self):
+        solution = self.__judge("print(4)", 10)
+        self.__get_ranking_entry(100)
+        self.assertTrue(ScoreboardCheckpoint.objects.exists())
+        # werdykt zmieniony np. w panelu administracyjnym
+        Solution.objects.filter(id=solution.id).update(solution_status=Solution.SolutionStatus.CORRECT)
+        Solution.objects.create(team=self.team, task=self.task, content="print(5)",
+                                upload_time=self.start + timezone.timedelta(minutes=5),
+                                solution_status=Solution.SolutionStatus.INCORRECT)
+
+        rebuild_scoreboard()
+
+        self.assertFalse(ScoreboardCheckpoint.objects.exists())
+        self.assertEquals((1, 10 * 60 + 1200), self.__get_ranking_entry(100))
+        self.assertEquals(get_ranking_entries(self.configuration),
+                          get_historical_ranking_entries(self.configuration, timezone.now()))
+
+
+class TestRankingExport(TestCase):
+    def setUp(self):
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Wypisz liczbę")
+        Test.objects.create(task=self.task, input=r'5', output=r'5')
+        self.configuration = Configuration.objects.create(participants_limit=50,
+                                                          competition_start_time=timezone.now())
+        export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(export_dir.cleanup)
+        self.export_dir = export_dir.name
+        settings_override = override_settings(RANKING_EXPORT_DIR=self.export_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def __read_exported_ranking(self):
+        with open(os.path.join(self.export_dir, 'ranking.json'), encoding='utf-8') as ranking_file:
+            return json.load(ranking_file)
+
+    def test_ranking_is_exported(self):
+        judge_solution(Solution.objects.create(team=self.team, task=self.task, content="print(input())",
+                                               upload_time=timezone.now()))
+
+        self.assertTrue(export_ranking())
+
+        exported_ranking = self.__read_exported_ranking()
+        self.assertFalse(exported_ranking['is_frozen'])
+        self.assertEquals([(1, 'kalisz1', 1)], [(entry['position'], entry['team_username'], entry['correct_solutions'])
+                                                for entry in exported_ranking['ranking_entries']])
+        with open(os.path.join(self.export_dir, 'ranking.html'), encoding='utf-8') as ranking_file:
+            self.assertIn('kalisz1', ranking_file.read())
+        self.assertFalse([name for name in os.listdir(self.export_dir) if name.startswith('.tmp-')])
+
+    def test_unchanged_ranking_is_not_exported_again(self):
+        export_ranking()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(export_ranking())
+
+        self.assertEquals(1, len(queries))
+        bump_scoreboard_version()
+        self.assertTrue(export_ranking())
+
+    def test_export_sees_ranking_frozen_by_other_process(self):
+        export_ranking()
+        # widocznosc wylaczona w procesie serwera - sygnaly czyszczace pamiec podreczna wykonaly sie tylko tam
+        Configuration.objects.update(ranking_visibility=Configuration.RankingVisibility.INVISIBLE,
+                                     ranking_visibility_change_time=timezone.now())
+        bump_scoreboard_version()
+
+        self.assertTrue(export_ranking())
+
+        self.assertTrue(self.__read_exported_ranking()['is_frozen'])
+
+    def test_frozen_ranking_is_exported_when_ranking_is_invisible(self):
+        self.configuration.ranking_visibility = Configuration.RankingVisibility.INVISIBLE
+        self.configuration.ranking_visibility_change_time = timezone.now()
+        self.configuration.save()
+        judge_solution(Solution.objects.create(team=self.team, task=self.task, content="print(input())",
+                                               upload_time=timezone.now() + timezone.timedelta(minutes=1)))
+
+        export_ranking()
+
+        exported_ranking = self.__read_exported_ranking()
+        self.assertTrue(exported_ranking['is_frozen'])
+        self.assertEquals(0, exported_ranking['ranking_entries'][0]['correct_solutions'])
+
+
+class TestConfigurationCache(TestCase):
+    def setUp(self):
+        self.configuration = Configuration.objects.create(participants_limit=50)
+        self.addCleanup(clear_request_memo)
+
+    def test_configuration_is_read_once(self):
+        get_configuration()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEquals(50, get_configuration().participants_limit)
+
+        self.assertFalse(any('competition_configuration' in query['sql'] for query in queries))
+
+    def test_change_saved_by_other_process_is_visible(self):
+        get_configuration()
+        # inny proces zapisuje konfiguracje; sygnaly (i czyszczenie pamieci podrecznej) wykonuja sie tylko u niego
+        Configuration.objects.update(ranking_visibility=Configuration.RankingVisibility.INVISIBLE)
+        bump_scoreboard_version()
+
+        self.assertEquals(Configuration.RankingVisibility.INVISIBLE, get_configuration().ranking_visibility)
+
+    def test_save_invalidates_configuration(self):
+        get_configuration()
+        self.configuration.participants_limit = 10
+        self.configuration.save()
+
+        self.assertEquals(10, get_configuration().participants_limit)
+
+    def test_request_memo_does_not_use_cache(self):
+        start_request_memo()
+        configuration = get_configuration()
+
+        self.assertIs(configuration, get_configuration())
+        clear_request_memo()
+        self.assertIsNot(configuration, get_configuration())
+
+
+class TestWarmUp(TestCase):
+    def setUp(self):
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Wypisz liczbę")
+        Test.objects.create(task=self.task, input=r'5', output=r'5')
+        Configuration.objects.create(participants_limit=50, competition_start_time=timezone.now())
+
+    def test_warm_up_fills_caches(self):
+        self.assertEquals(1, warm_up())
+
+        with self.assertNumQueries(1):  # tylko wersja wynikow
+            get_configuration()
+            get_tasks()
+        configuration = get_configuration()
+        with self.assertNumQueries(1):
+            get_cached_ranking(configuration, False)
+
+    def test_warmup_command_requires_shared_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('warmup')
+
+    def test_warm_up_judge_loads_tests(self):
+        warm_up_judge()
+
+        with self.assertNumQueries(1):
+            get_task_tests(self.task)
+
+
+class TestOutputChecker(TestCase):
+    def __check(self, expected_output, output_chunks, output_limit=1024, strip_expected_output=False):
+        with OutputChecker(lambda: io.StringIO(expected_output), output_limit,
+                           strip_expected_output) as output_checker:
+            for chunk in output_chunks:
+                if not output_checker.feed(chunk.encode('utf-8')):
+                    return 'limit'
+            if output_checker.is_output_correct():
+                return 'correct'
+            if output_checker.is_presentation_error():
+                return 'presentation'
+            return 'wrong'
+
+    def test_correct_output_in_chunks(self):
+        self.assertEquals('correct', self.__check('Fizz\nBuzz', ['Fi', 'zz\nBu', 'zz\n', '  \n']))
+
+    def test_trailing_whitespace_in_expected_output(self):
+        self.assertEquals('presentation', self.__check('Fizz\n', ['Fizz\n']))
+        self.assertEquals('correct', self.__check('Fizz\n', ['Fizz'], strip_expected_output=True))
+        self.assertEquals('correct', self.__check('Fizz\n', ['Fizz \n'], strip_expected_output=True))
+
+    def test_presentation_error(self):
+        self.assertEquals('presentation', self.__check('Fizz\nBuzz', ['Fizz', 'Buzz']))
+        self.assertEquals('presentation', self.__check('Fizz\nBuzz', [' Fizz\n\nBuzz']))
+
+    def test_wrong_output(self):
+        self.assertEquals('wrong', self.__check('Fizz\nBuzz', ['Fizz\n']))
+        self.assertEquals('wrong', self.__check('Fizz', ['Fizz\nBuzz']))
+
+    def test_output_limit_exceeded(self):
+        self.assertEquals('limit', self.__check('Fizz', ['Fizz' * 100], output_limit=10))
+
+    def test_windows_newlines_in_output(self):
+        self.assertEquals('correct', self.__check('Fizz\nBuzz', ['Fizz\r', '\nBuzz\r\n']))
+        self.assertEquals('correct', self.__check('Fizz\nBuzz', ['Fizz\rBuzz']))
+
+
+class TestFileBackedTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        self.settings_override.enable()
+        team_user = User.objects.create_user(username="kalisz1", password="123456789")
+        self.team = Team.objects.create(team_as_user=team_user, school_name="Szkoła", school_city="Kalisz")
+        self.task = Task.objects.create(description="Zsumuj liczby")
+        numbers = range(200000)
+        self.test = Test(task=self.task)
+        self.test.input_file.save('input.txt', ContentFile('\n'.join(map(str, numbers))), save=False)
+        self.test.output_file.save('output.txt', ContentFile(str(sum(numbers)) + '\n'), save=False)
+        self.test.save()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media_root.cleanup()
+
+    def __judge(self, content):
+        solution = Solution.objects.create(team=self.team, task=self.task, content=content,
+                                           upload_time=timezone.now())
+        return judge_solution(solution)
+
+    def test_correct_solution(self):
+        self.assertEquals(Solution.SolutionStatus.CORRECT,
+                          self.__judge("import sys\nprint(sum(int(line) for line in sys.stdin))"))
+
+    def test_expected_output_with_windows_newlines(self):
+        self.test.output_file.save('output.txt', ContentFile('1\r\n2\r\n'))
+
+        self.assertEquals(Solution.SolutionStatus.CORRECT, self.__judge("print(1)\nprint(2)"))
+        self.assertEquals(Solution.SolutionStatus.CORRECT, self.__judge("print(1, end='\\r\\n')\nprint(2)"))
+
+    @override_settings(JUDGE_OUTPUT_LIMIT=1024)
+    def test_output_limit_exceeded(self):
+        self.assertEquals(Solution.SolutionStatus.INCORRECT, self.__judge("while True:\n    print('x' * 1000)"))
+
+    def test_failed_job_is_returned_to_queue(self):
+        os.remove(self.test.input_file.path)
+        solution = Solution.objects.create(team=self.team, task=self.task, content="print(5)",
+                                           upload_time=timezone.now())
+        enqueue_solution(solution)
+
+        with self.assertRaises(FileNotFoundError):
+            judge_job(claim_next_job())
+
+        job = JudgeQueueEntry.objects.get(solution=solution)
+        self.assertEquals((1, None), (job.attempts_count, job.claim_time))
+        solution.refresh_from_db()
+        self.assertEquals(Solution.SolutionStatus.NOT_EVALUATED, solution.solution_status)
+
+    def test_failing_job_gets_runtime_error_after_max_attempts(self):
+        os.remove(self.test.input_file.path)
+        solution = Solution.objects.create(team=self.team, task=self.task, content="print(5)",
+                                           upload_time=timezone.now())
+        enqueue_solution(solution)
+
+        with self.assertLogs('competition.judge', 'ERROR') as logs:
+            self.assertEquals(0, run_pending_jobs())
+
+        self.assertEquals(3, len(logs.records))
+        solution.refresh_from_db()
+        self.assertEquals(Solution.SolutionStatus.RUNTIME_ERROR, solution.solution_status)
+        self.assertEquals(0, JudgeQueueEntry.objects.all().count())
+        self.assertEquals(0, SolutionTestResult.objects.filter(solution=solution, was_run=True).count())
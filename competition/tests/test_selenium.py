@@ -13,6 +13,8 @@ from users.models import Team
 from django.utils import timezone
 from selenium.webdriver.support.ui import Select
 from competition.models import Configuration, Solution, Task, Test
+from competition.judge import run_pending_jobs
+from competition.scoreboard import rebuild_scoreboard
 
 
 def login(user, driver, live_url):
@@ -99,6 +101,8 @@ def set_up_example_data(teams, time_now, configuration):
                             upload_time=time_now -
                             datetime.timedelta(minutes=100),
                             solution_status=Solution.SolutionStatus.INCORRECT)
+    configuration.save()
+    rebuild_scoreboard()
 
 
 class RankingTest(StaticLiveServerTestCase):
@@ -300,6 +304,12 @@ def set_competition_status_active(configuration):
     configuration.save()
 
 
+def judge_sent_solution():
+    sleep(0.5)
+    run_pending_jobs()
+    sleep(1.5)
+
+
 def fill_in_solution_textarea(driver, solution_content):
     textarea = driver.find_element_by_id('id_solution')
     textarea.send_keys(solution_content)
@@ -459,6 +469,7 @@ class TestSendSolutionPage(StaticLiveServerTestCase):
 
         self.browser.find_element_by_id('send-btn').click()
         click_button_on_confirmation_modal(self.browser, 'Tak')
+        judge_sent_solution()
 
         incorrect_solution_modal = self.browser.find_element_by_class_name('wrong-answer-modal')
 
@@ -496,6 +507,7 @@ for i in range(n):
 
         self.browser.find_element_by_id('send-btn').click()
         click_button_on_confirmation_modal(self.browser, 'Tak')
+        judge_sent_solution()
 
         correct_solution_modal = self.browser.find_element_by_class_name('correct-answer-modal')
 
@@ -529,6 +541,7 @@ for i in range(n):
 
         self.browser.find_element_by_id('send-btn').click()
         click_button_on_confirmation_modal(self.browser, 'Tak')
+        judge_sent_solution()
 
         incorrect_solution_modal = self.browser.find_element_by_class_name('wrong-answer-modal')
 
@@ -557,6 +570,7 @@ for i in range(n):
 
         self.browser.find_element_by_id('send-btn').click()
         click_button_on_confirmation_modal(self.browser, 'Tak')
+        judge_sent_solution()
 
         incorrect_solution_modal = self.browser.find_element_by_class_name(
             'wrong-answer-modal')
@@ -586,6 +600,7 @@ for i in range(n):
 
         self.browser.find_element_by_id('send-btn').click()
         click_button_on_confirmation_modal(self.browser, 'Tak')
+        judge_sent_solution()
 
         incorrect_solution_modal = self.browser.find_element_by_class_name(
             'wrong-answer-modal')
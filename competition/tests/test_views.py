@@ -1,15 +1,26 @@
-from competition.models import Task, Solution, Test
+from competition.configuration import get_configuration
+from competition.events import ranking_events
+from competition.judge import run_pending_jobs
+from competition.scoreboard import rebuild_scoreboard
+from competition.models import Task, Solution, Test, JudgeQueueEntry
 from users.models import Team
 
 import datetime
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
 
 from django.utils import timezone
 
+from django.conf import settings
 from django.contrib.auth.models import User, Group
-from django.test import TestCase, Client
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from competition.models import Configuration
+from competition.models import Configuration, RankingSnapshot
 
 
 class TestViewSendSolution(TestCase):
@@ -98,6 +109,51 @@ class TestViewSendSolution(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEquals(1, Solution.objects.all().count())
 
+    def test_send_solution_POST_team_authenticated_solution_is_queued(self):
+        self.configuration.competition_status = Configuration.CompetitionStatus.ACTIVE
+        self.configuration.save()
+        self.client.login(username=self.team_username, password=self.team_password)
+        response = self.client.post(self.send_solution_url, {
+            "solution": "print(5)"
+        })
+
+        solution = Solution.objects.all()[0]
+        self.assertEqual(response.status_code, 200)
+        self.assertEquals(Solution.SolutionStatus.NOT_EVALUATED, solution.solution_status)
+        self.assertEquals(1, JudgeQueueEntry.objects.filter(solution=solution).count())
+
+        self.assertEquals(1, run_pending_jobs())
+        self.assertEquals(0, JudgeQueueEntry.objects.all().count())
+
+    def test_send_solution_POST_team_authenticated_solution_too_long(self):
+        self.configuration.competition_status = Configuration.CompetitionStatus.ACTIVE
+        self.configuration.save()
+        self.client.login(username=self.team_username, password=self.team_password)
+        response = self.client.post(self.send_solution_url, {
+            "solution": "print(5)\n" + "#" * 2048
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_solution_too_long'])
+        self.assertEquals(0, Solution.objects.all().count())
+        self.assertEquals(0, JudgeQueueEntry.objects.all().count())
+
+    def test_solution_status_GET_team_authenticated(self):
+        self.configuration.competition_status = Configuration.CompetitionStatus.ACTIVE
+        self.configuration.save()
+        self.client.login(username=self.team_username, password=self.team_password)
+        self.client.post(self.send_solution_url, {
+            "solution": "print(5)"
+        })
+        solution_status_url = reverse('solution-status', args=[Solution.objects.all()[0].id])
+
+        response = self.client.get(solution_status_url)
+        self.assertEquals(Solution.SolutionStatus.NOT_EVALUATED, response.json()['solution_status'])
+
+        run_pending_jobs()
+        response = self.client.get(solution_status_url)
+        self.assertEquals(Solution.SolutionStatus.INCORRECT, response.json()['solution_status'])
+
     def test_send_solution_POST_team_authenticated_and_competition_status_inactive(self):
         logged_team = self.client.login(
             username=self.team_username,
@@ -143,6 +199,8 @@ for i in range(n):
         print(number)"""
         })
 
+        run_pending_jobs()
+
         self.assertEqual(response.status_code, 200)
         self.assertEquals(1, Solution.objects.all().count())
         self.assertEquals(Solution.SolutionStatus.CORRECT, Solution.objects.all()[0].solution_status)
@@ -158,6 +216,8 @@ for i in range(n):
             "solution": "print(5)"
         })
 
+        run_pending_jobs()
+
         self.assertEqual(response.status_code, 200)
         self.assertEquals(1, Solution.objects.all().count())
         self.assertEquals(Solution.SolutionStatus.INCORRECT, Solution.objects.all()[0].solution_status)
@@ -183,6 +243,8 @@ for i in range(n):
         print(number)"""
         })
 
+        run_pending_jobs()
+
         self.assertEqual(response.status_code, 200)
         self.assertEquals(1, Solution.objects.all().count())
         self.assertEquals(Solution.SolutionStatus.PRESENTATION_ERROR,
@@ -199,6 +261,8 @@ for i in range(n):
             "solution": "for in range(5)"
         })
 
+        run_pending_jobs()
+
         self.assertEqual(response.status_code, 200)
         self.assertEquals(1, Solution.objects.all().count())
         self.assertEquals(Solution.SolutionStatus.COMPILATION_ERROR,
@@ -215,6 +279,8 @@ for i in range(n):
             "solution": "aaa"
         })
 
+        run_pending_jobs()
+
         self.assertEqual(response.status_code, 200)
         self.assertEquals(1, Solution.objects.all().count())
         self.assertEquals(Solution.SolutionStatus.RUNTIME_ERROR,
@@ -335,8 +401,24 @@ class TestViewConfigPanel(TestCase):
         configuration = Configuration.objects.all()[0]
         self.assertEqual(configuration.competition_status, configuration.RankingVisibility.INVISIBLE)
         self.assertIsNotNone(configuration.ranking_visibility_change_time)
+        self.assertEqual(RankingSnapshot.objects.get().freeze_time, configuration.ranking_visibility_change_time)
+
+    def test_POST_changes_current_configuration_row(self):
+        get_configuration()
+        # zmiana zapisana przez inny proces, jeszcze niewidoczna w pamieci podrecznej konfiguracji
+        Configuration.objects.update(participants_limit=80)
+
+        self.client.login(username=self.judge_username, password=self.judge_password)
+        self.client.post(self.config_panel_url_post, {
+            'ranking_visibility': 'on'
+        })
+
+        configuration = Configuration.objects.all()[0]
+        self.assertEqual(configuration.ranking_visibility, configuration.RankingVisibility.VISIBLE)
+        self.assertEqual(configuration.participants_limit, 80)
 
     def test_POST_enable_ranking_visibility(self):
+        RankingSnapshot.objects.create(freeze_time=timezone.now(), ranking_entries=[])
         self.client.login(username=self.judge_username, password=self.judge_password)
         response = self.client.post(self.config_panel_url_post, {
             'ranking_visibility': 'on'
@@ -344,3 +426,316 @@ class TestViewConfigPanel(TestCase):
 
         configuration = Configuration.objects.all()[0]
         self.assertEqual(configuration.ranking_visibility, configuration.RankingVisibility.VISIBLE)
+        self.assertFalse(RankingSnapshot.objects.exists())
+
+
+class TestViewRanking(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.ranking_url = reverse('ranking')
+        self.configuration = Configuration.objects.create(
+            participants_limit=50, competition_status=Configuration.CompetitionStatus.ACTIVE,
+            competition_start_time=timezone.now() - datetime.timedelta(hours=1))
+        self.team_group = Group.objects.create(name='team')
+        self.task = Task.objects.create(description='Zadanie')
+        self.team_password = 'example_password'
+        self.teams = [self.__create_team('team{}'.format(i)) for i in range(3)]
+
+    def __create_team(self, username):
+        team_user = User.objects.create_user(username=username, password=self.team_password)
+        team_user.groups.add(self.team_group)
+        return Team.objects.create(team_as_user=team_user, school_name='Szkoła', school_city='Kalisz')
+
+    def __create_solution(self, team, solution_status, minutes_after_start):
+        upload_time = self.configuration.competition_start_time + datetime.timedelta(minutes=minutes_after_start)
+        Solution.objects.create(team=team, task=self.task, content='print(1)', upload_time=upload_time,
+                                solution_status=solution_status)
+
+    def __get_ranking(self, **query):
+        response = self.client.get(self.ranking_url, query)
+        return [(entry['team_username'], entry['correct_solutions'], entry['formatted_time'])
+                for entry in response.context['ranking_page']]
+
+    def __get_ranking_positions(self, **query):
+        response = self.client.get(self.ranking_url, query)
+        return [(entry['position'], entry['team_username']) for entry in response.context['ranking_page']]
+
+    def test_ranking_order_and_times(self):
+        self.__create_solution(self.teams[0], Solution.SolutionStatus.CORRECT, 30)
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.INCORRECT, 2)
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.CORRECT, 5)
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.NOT_EVALUATED, 15)
+        rebuild_scoreboard()
+        self.client.login(username='team0', password=self.team_password)
+
+        self.assertEqual(self.__get_ranking(), [('team1', 1, '0:25'), ('team0', 1, '0:30'), ('team2', 0, '0:00')])
+
+    def test_ranking_task_entries(self):
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.INCORRECT, 2)
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.CORRECT, 5)
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.INCORRECT, 8)
+        self.__create_solution(self.teams[2], Solution.SolutionStatus.RUNTIME_ERROR, 8)
+        rebuild_scoreboard()
+        self.client.login(username='team0', password=self.team_password)
+
+        response = self.client.get(self.ranking_url)
+
+        self.assertEqual([entry['task_entries'] for entry in response.context['ranking_page']], [
+            [{'incorrect_solutions': 1, 'accepted_time': '0:05'}],
+            [{'incorrect_solutions': 0, 'accepted_time': None}],
+            [{'incorrect_solutions': 1, 'accepted_time': None}],
+        ])
+
+    def test_ranking_query_count_does_not_depend_on_teams_count(self):
+        self.client.login(username='team0', password=self.team_password)
+        self.__get_ranking()
+        rebuild_scoreboard()
+        with CaptureQueriesContext(connection) as queries:
+            self.__get_ranking()
+        queries_count = len(queries)
+
+        for i in range(3, 10):
+            team = self.__create_team('team{}'.format(i))
+            self.__create_solution(team, Solution.SolutionStatus.CORRECT, i)
+        rebuild_scoreboard()
+        with self.assertNumQueries(queries_count):
+            self.__get_ranking()
+
+    def test_ranking_reads_configuration_from_cache(self):
+        self.client.login(username='team0', password=self.team_password)
+        self.__get_ranking()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.__get_ranking()
+
+        self.assertFalse(any('competition_configuration' in query['sql'] for query in queries))
+
+    def test_ranking_resolves_user_roles_once(self):
+        self.client.login(username='team0', password=self.team_password)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.__get_ranking()
+
+        self.assertEqual(1, sum('auth_group' in query['sql'] for query in queries))
+
+    def test_ranking_frozen_for_teams(self):
+        self.__create_solution(self.teams[2], Solution.SolutionStatus.CORRECT, 10)
+        self.configuration.ranking_visibility = Configuration.RankingVisibility.INVISIBLE
+        self.configuration.ranking_visibility_change_time = self.configuration.competition_start_time + \
+            datetime.timedelta(minutes=20)
+        self.configuration.save()
+        self.__create_solution(self.teams[0], Solution.SolutionStatus.CORRECT, 30)
+        rebuild_scoreboard()
+        self.client.login(username='team0', password=self.team_password)
+
+        self.assertEqual(self.__get_ranking()[0], ('team2', 1, '0:10'))
+
+    def test_ranking_frozen_snapshot_is_not_recalculated(self):
+        self.configuration.ranking_visibility = Configuration.RankingVisibility.INVISIBLE
+        self.configuration.ranking_visibility_change_time = self.configuration.competition_start_time + \
+            datetime.timedelta(minutes=20)
+        self.configuration.save()
+        self.client.login(username='team0', password=self.team_password)
+        self.__get_ranking()
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.CORRECT, 10)
+
+        with CaptureQueriesContext(connection) as queries:
+            ranking = self.__get_ranking()
+
+        self.assertEqual(ranking[0], ('team0', 0, '0:00'))
+        self.assertFalse(any('competition_solution' in query['sql'] for query in queries))
+
+    def test_ranking_live_for_judges_when_frozen(self):
+        judge_user = User.objects.create_user(username='judge', password=self.team_password)
+        judge_user.groups.add(Group.objects.create(name='judge'))
+        self.configuration.ranking_visibility = Configuration.RankingVisibility.INVISIBLE
+        self.configuration.ranking_visibility_change_time = self.configuration.competition_start_time
+        self.configuration.save()
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.CORRECT, 10)
+        rebuild_scoreboard()
+        self.client.login(username='judge', password=self.team_password)
+
+        self.assertEqual(self.__get_ranking()[0], ('team1', 1, '0:10'))
+
+    def test_ranking_at_given_time_for_judges(self):
+        judge_user = User.objects.create_user(username='judge', password=self.team_password)
+        judge_user.groups.add(Group.objects.create(name='judge'))
+        self.configuration.competition_start_time = (timezone.localtime() - datetime.timedelta(days=1)).replace(
+            hour=8, minute=0)
+        self.configuration.save()
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.CORRECT, 10)
+        self.__create_solution(self.teams[2], Solution.SolutionStatus.CORRECT, 40)
+        rebuild_scoreboard()
+        self.client.login(username='judge', password=self.team_password)
+
+        self.assertEqual(self.__get_ranking(time='08:20')[0], ('team1', 1, '0:10'))
+        self.assertEqual(self.__get_ranking(time='08:20')[1][1], 0)
+        self.assertEqual(self.client.get(self.ranking_url, {'time': '08:20'}).context['ranking_time'].hour, 8)
+
+    def test_ranking_at_given_time_does_not_subscribe_to_events(self):
+        judge_user = User.objects.create_user(username='judge', password=self.team_password)
+        judge_user.groups.add(Group.objects.create(name='judge'))
+        self.client.login(username='judge', password=self.team_password)
+
+        self.assertContains(self.client.get(self.ranking_url), '/ranking/events/')
+        self.assertNotContains(self.client.get(self.ranking_url, {'time': '08:20'}), '/ranking/events/')
+
+    @override_settings(RANKING_PAGE_SIZE=2)
+    def test_only_page_with_last_position_shows_new_teams(self):
+        self.client.login(username='team0', password=self.team_password)
+
+        self.assertContains(self.client.get(self.ranking_url), 'const lastPagePosition = Math.max(...pagePositions);')
+        self.assertContains(self.client.get(self.ranking_url, {'page': 2}), 'const lastPagePosition = Infinity;')
+        self.assertContains(self.client.get(self.ranking_url, {'order': 'desc'}), 'const lastPagePosition = Infinity;')
+
+    def test_ranking_at_given_time_uses_competition_time(self):
+        judge_user = User.objects.create_user(username='judge', password=self.team_password)
+        judge_user.groups.add(Group.objects.create(name='judge'))
+        self.configuration.competition_start_time = (timezone.localtime() - datetime.timedelta(days=1)).replace(
+            hour=8, minute=0)
+        self.configuration.total_pause_time_in_minutes = 30
+        self.configuration.save()
+        # upload_time jest czasem zawodow - rozwiazanie wyslane o 8:40 wedlug zegara, po 30 minutach przerwy
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.CORRECT, 10)
+        rebuild_scoreboard()
+        self.client.login(username='judge', password=self.team_password)
+
+        response = self.client.get(self.ranking_url, {'time': '08:15'})
+
+        self.assertEqual(self.__get_ranking(time='08:15')[0], ('team1', 1, '0:10'))
+        self.assertContains(response, 'zegar cofnięty o przerwy (30 min)')
+
+    def test_ranking_at_given_time_is_ignored_for_teams(self):
+        self.client.login(username='team0', password=self.team_password)
+
+        self.assertIsNone(self.client.get(self.ranking_url, {'time': '08:20'}).context['ranking_time'])
+
+    def test_ranking_descending_order(self):
+        self.__create_solution(self.teams[2], Solution.SolutionStatus.CORRECT, 10)
+        rebuild_scoreboard()
+        self.client.login(username='team0', password=self.team_password)
+
+        self.assertEqual(self.__get_ranking_positions(order='desc'), [(3, 'team1'), (2, 'team0'), (1, 'team2')])
+
+    @override_settings(RANKING_PAGE_SIZE=2)
+    def test_ranking_pages(self):
+        self.client.login(username='team0', password=self.team_password)
+
+        self.assertEqual(self.__get_ranking_positions(), [(1, 'team0'), (2, 'team1')])
+        self.assertEqual(self.__get_ranking_positions(page=2), [(3, 'team2')])
+
+    @override_settings(RANKING_PAGE_SIZE=2)
+    def test_ranking_page_of_my_team(self):
+        self.client.login(username='team2', password=self.team_password)
+
+        self.assertEqual(self.__get_ranking_positions(my_team=''), [(3, 'team2')])
+        self.assertEqual(self.__get_ranking_positions(my_team='', order='desc'), [(3, 'team2'), (2, 'team1')])
+
+    def test_ranking_api_pages(self):
+        self.__create_solution(self.teams[2], Solution.SolutionStatus.CORRECT, 10)
+        rebuild_scoreboard()
+        self.client.login(username='team0', password=self.team_password)
+
+        response = self.client.get(reverse('ranking-api'), {'offset': 1, 'limit': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['teams_count'], 3)
+        self.assertEqual(response.json()['ranking_entries'], [
+            {'position': 2, 'team_username': 'team0', 'correct_solutions': 0, 'time': 0, 'formatted_time': '0:00',
+             'task_entries': [{'incorrect_solutions': 0, 'accepted_time': None}]}])
+
+    def test_ranking_api_not_modified(self):
+        self.client.login(username='team0', password=self.team_password)
+        etag = self.client.get(reverse('ranking-api'))['ETag']
+
+        response = self.client.get(reverse('ranking-api'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_ranking_api_etag_changes_after_verdict(self):
+        self.client.login(username='team0', password=self.team_password)
+        etag = self.client.get(reverse('ranking-api'))['ETag']
+        self.__create_solution(self.teams[1], Solution.SolutionStatus.CORRECT, 10)
+        rebuild_scoreboard()
+
+        response = self.client.get(reverse('ranking-api'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['ranking_entries'][0]['team_username'], 'team1')
+
+    def test_ranking_api_invalid_page(self):
+        self.client.login(username='team0', password=self.team_password)
+
+        response = self.client.get(reverse('ranking-api'), {'limit': 'abc'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(RANKING_EVENTS_POLL_INTERVAL=0.01)
+class TestRankingEvents(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.configuration = Configuration.objects.create(participants_limit=50,
+                                                          competition_start_time=timezone.now())
+        self.team_password = 'example_password'
+        team_group = Group.objects.create(name='team')
+        self.teams = []
+        for username in ['team0', 'team1']:
+            team_user = User.objects.create_user(username=username, password=self.team_password)
+            team_user.groups.add(team_group)
+            self.teams.append(Team.objects.create(team_as_user=team_user, school_name='Szkoła',
+                                                  school_city='Kalisz'))
+        self.task = Task.objects.create(description='Zadanie')
+
+    def __get_session_cookie(self):
+        self.client.login(username='team0', password=self.team_password)
+        return '{}={}'.format(settings.SESSION_COOKIE_NAME,
+                              self.client.cookies[settings.SESSION_COOKIE_NAME].value).encode('latin-1')
+
+    @staticmethod
+    def __parse_event(message):
+        event_name, event_data = message['body'].decode('utf-8').strip().split('\n')
+        return event_name, json.loads(event_data[len('data: '):])
+
+    def test_unauthenticated_user_is_rejected(self):
+        async def open_events():
+            communicator = ApplicationCommunicator(ranking_events, {'type': 'http', 'headers': []})
+            await communicator.send_input({'type': 'http.request'})
+            return await communicator.receive_output()
+
+        self.assertEqual(async_to_sync(open_events)()['status'], 403)
+
+    def test_changed_rows_are_pushed(self):
+        session_cookie = self.__get_session_cookie()
+
+        def add_correct_solution():
+            Solution.objects.create(team=self.teams[1], task=self.task, content='print(1)',
+                                    upload_time=timezone.now(), solution_status=Solution.SolutionStatus.CORRECT)
+            rebuild_scoreboard()
+
+        async def receive_events():
+            communicator = ApplicationCommunicator(ranking_events, {'type': 'http',
+                                                                    'headers': [(b'cookie', session_cookie)]})
+            await communicator.send_input({'type': 'http.request'})
+            response_start = await communicator.receive_output()
+            initial_event = await communicator.receive_output()
+            await sync_to_async(add_correct_solution)()
+            change_event = await communicator.receive_output()
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait()
+            return response_start, initial_event, change_event
+
+        response_start, initial_event, change_event = async_to_sync(receive_events)()
+
+        self.assertEqual(response_start['status'], 200)
+        event_name, initial_rows = self.__parse_event(initial_event)
+        self.assertEqual(event_name, 'event: ranking')
+        self.assertEqual([(row['position'], row['team_username']) for row in initial_rows],
+                         [(1, 'team0'), (2, 'team1')])
+        _, changed_rows = self.__parse_event(change_event)
+        self.assertEqual([(row['position'], row['team_username'], row['correct_solutions']) for row in changed_rows],
+                         [(1, 'team1', 1), (2, 'team0', 0)])
@@ -1,50 +1,73 @@
-import subprocess
 import datetime
-from os import path
-import os
-from django.shortcuts import render, redirect
-
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotModified
+from django.shortcuts import render, redirect, get_object_or_404
+from django.utils.http import quote_etag, parse_etags
+
+from .configuration import get_configuration, get_tasks
 from .decorators import team_user, authorized_user, judge_user
 from .forms import ConfigPanelForm, SolutionForm
-import random
-from enum import Enum
-from .models import Configuration, Task, Test, Solution, SolutionTestResult
-from users.models import Team
+from .judge import enqueue_solution
+from .middleware import get_user_roles
+from .models import Configuration, Solution
+from .scoreboard import get_cached_ranking, get_historical_ranking_entries, create_ranking_snapshot, \
+    delete_ranking_snapshot, get_solved_tasks, is_task_solved
+from .warmup import warm_up
 from django.utils import timezone
 
 
 @judge_user
 def configpanel(request):
-    configuration = Configuration.objects.all()[0]
     if request.method == 'POST':
         form = ConfigPanelForm(request.POST)
         if form.is_valid():
             new_competition_status = form.cleaned_data['competition_status']
             new_ranking_visibility = form.cleaned_data['ranking_visibility']
-            old_competition_status = configuration.competition_status
-            old_ranking_visibility = configuration.ranking_visibility
-
-            if new_ranking_visibility != old_ranking_visibility:
-                if new_ranking_visibility == Configuration.RankingVisibility.INVISIBLE:  # wylaczono widocznosc rankingu
-                    configuration.ranking_visibility_change_time = __get_offseted_time(timezone.now())
-                configuration.ranking_visibility = new_ranking_visibility
-
-            if new_competition_status != old_competition_status:
-                if new_competition_status == Configuration.CompetitionStatus.ACTIVE:
-                    if configuration.competition_start_time is None:  # rozpoczynamy zawody
-                        configuration.competition_start_time = timezone.now()
-                    else:  # odpauzowano zawody
-                        pause_duration = timezone.now() - configuration.competition_pause_time
-                        configuration.total_pause_time_in_minutes += __convert_timedelta_to_minutes(pause_duration)
-                else:  # zapauzowano zawody
-                    configuration.competition_pause_time = timezone.now()
-                configuration.competition_status = new_competition_status
-            configuration.save()
+            with transaction.atomic():
+                # zmiany nanoszone na aktualny wiersz z bazy, a nie na konfiguracje z pamieci podrecznej, ktora mogla
+                # juz zostac zmieniona przez innego sedziego
+                configuration = Configuration.objects.select_for_update()[0]
+                old_competition_status = configuration.competition_status
+                old_ranking_visibility = configuration.ranking_visibility
+
+                if new_ranking_visibility != old_ranking_visibility:
+                    if new_ranking_visibility == Configuration.RankingVisibility.INVISIBLE:  # wylaczono widocznosc
+                        configuration.ranking_visibility_change_time = __get_offseted_time(timezone.now(),
+                                                                                           configuration)
+                    configuration.ranking_visibility = new_ranking_visibility
+
+                if new_competition_status != old_competition_status:
+                    if new_competition_status == Configuration.CompetitionStatus.ACTIVE:
+                        if configuration.competition_start_time is None:  # rozpoczynamy zawody
+                            configuration.competition_start_time = timezone.now()
+                        else:  # odpauzowano zawody
+                            pause_duration = timezone.now() - configuration.competition_pause_time
+                            configuration.total_pause_time_in_minutes += __convert_timedelta_to_minutes(pause_duration)
+                    else:  # zapauzowano zawody
+                        configuration.competition_pause_time = timezone.now()
+                    configuration.competition_status = new_competition_status
+
+                configuration.save()
+                if new_ranking_visibility != old_ranking_visibility:
+                    __update_ranking_snapshot(configuration)
+                if new_competition_status != old_competition_status and \
+                        new_competition_status == Configuration.CompetitionStatus.ACTIVE:
+                    # przy wspolnej pamieci podrecznej konfiguracja i zadania trafiaja do niej dla wszystkich
+                    # procesow serwera, przy lokalnej - tylko dla procesu, ktory obsluguje to zapytanie
+                    transaction.on_commit(warm_up)
             return redirect('home')
-    else:
-        form = ConfigPanelForm()
 
-    return render(request, 'competition/configpanel.html', {"configuration": configuration})
+    return render(request, 'competition/configpanel.html', {"configuration": get_configuration()})
+
+
+def __update_ranking_snapshot(configuration):
+    # zespoly widza zamrozony ranking do czasu ponownego wlaczenia widocznosci, sedziowie zawsze aktualny
+    if configuration.ranking_visibility == Configuration.RankingVisibility.INVISIBLE:
+        create_ranking_snapshot(configuration)
+    else:
+        delete_ranking_snapshot()
 
 
 def __convert_timedelta_to_minutes(timedelta):
@@ -53,32 +76,33 @@ def __convert_timedelta_to_minutes(timedelta):
 
 @team_user
 def send_solution(request, task_id):
-    task = Task.objects.all().filter(id=task_id).first()
-    team = Team.objects.all().filter(team_as_user__username=request.user).first()
+    task = next((task for task in get_tasks() if task.id == task_id), None)
+    team = request.user_roles.team
     if not __is_valid_team_and_task(task, team):
         return redirect('home')
 
     solution_status = 1
-    configuration = Configuration.objects.all()[0]
+    configuration = get_configuration()
     if request.method == 'POST':
         competition_status = configuration.competition_status
-        solution = request.POST['solution']
-        if competition_status != 0:
-            solution = Solution.objects.create(task=task, team=team,
-                                               content=__sanitize_solution_content(solution),
-                                               upload_time=__get_offseted_time(timezone.now()))
-            solution_filename = __save_solution_to_file(solution)
-            solution_status = __run_tests(solution_filename, task, solution)
-            __delete_solution_file(solution_filename)
-            solution.solution_status = solution_status
-            solution.save()
+        solution = __sanitize_solution_content(request.POST['solution'])
+        solution_id = None
+        is_solution_too_long = len(solution) > __get_solution_max_length()
+        if competition_status != 0 and not is_solution_too_long:
+            with transaction.atomic():
+                solution = Solution.objects.create(task=task, team=team, content=solution,
+                                                   upload_time=__get_offseted_time(timezone.now(), configuration))
+                enqueue_solution(solution)  # ocena odbywa sie w osobnym procesie (manage.py runjudge)
+            solution_status = solution.solution_status
+            solution_id = solution.id
             solution = solution.content
         else:
             solution_status = 1
 
         return render(request, 'competition/send_solution.html',
                       context={'solution_form': SolutionForm(initial={'solution': solution}), 'task': task,
-                               'solution_status': solution_status, 'competition_status': competition_status})
+                               'solution_status': solution_status, 'competition_status': competition_status,
+                               'solution_id': solution_id, 'is_solution_too_long': is_solution_too_long})
 
     context = {
         'solution_form': SolutionForm(),
@@ -89,8 +113,14 @@ def send_solution(request, task_id):
     return render(request, 'competition/send_solution.html', context)
 
 
-def __get_offseted_time(time_to_offset):
-    time_offset = Configuration.objects.all()[0].total_pause_time_in_minutes
+@team_user
+def check_solution_status(request, solution_id):
+    solution = get_object_or_404(Solution, id=solution_id, team__team_as_user=request.user)
+    return JsonResponse({'solution_status': solution.solution_status})
+
+
+def __get_offseted_time(time_to_offset, configuration):
+    time_offset = configuration.total_pause_time_in_minutes
     if time_offset is not None:
         return time_to_offset - datetime.timedelta(minutes=time_offset)
     return time_to_offset
@@ -99,164 +129,111 @@ def __get_offseted_time(time_to_offset):
 def __is_valid_team_and_task(task, team):
     if task is None or team is None:
         return False
-    team_tasks_with_statuses, _ = __get_team_tasks(team)
-    for team_task_with_status in team_tasks_with_statuses:
-        team_task = team_task_with_status['task']
-        is_finished = team_task_with_status['is_finished']
-        if team_task == task:
-            return not is_finished
-    return False
+    return not is_task_solved(get_solved_tasks(team.id), task.id)
 
 
 def __sanitize_solution_content(content):
     return '\n'.join(content.splitlines())
 
 
-def __save_solution_to_file(solution):
-    filename = __generate_filename()
-    file = open(filename, 'w')
-    file.write(solution.content)
-    file.close()
-    return filename
-
-
-def __generate_filename():
-    file_suffix = random.randint(1, 1000)
-    while True:
-        filename = "user_script{0}.py".format(file_suffix)
-        if not path.exists(filename):
-            return filename
-        file_suffix += 1
-
-
-def __run_tests(solution_script_path, task, solution):
-    tests = Test.objects.all().filter(task=task)
-    test_results = []
-    for test in tests:
-        test_result = __run_test(solution_script_path, test.input, test.output)
-        did_pass = test_result == TestResult.OKAY
-        SolutionTestResult.objects.create(solution=solution, test=test, did_pass=did_pass)
-        test_results.append(test_result)
-
-    for test_result in test_results:
-        if test_result is TestResult.TIME_EXCEEDED_ERROR:
-            return Solution.SolutionStatus.TIME_EXCEEDED_ERROR
-        elif test_result is TestResult.RUNTIME_ERROR:
-            return Solution.SolutionStatus.RUNTIME_ERROR
-        elif test_result is TestResult.COMPILATION_ERROR:
-            return Solution.SolutionStatus.COMPILATION_ERROR
-        elif test_result is TestResult.PRESENTATION_ERROR:
-            return Solution.SolutionStatus.PRESENTATION_ERROR
-        elif test_result is TestResult.WRONG_ANSWER:
-            return Solution.SolutionStatus.INCORRECT
-    return Solution.SolutionStatus.CORRECT
-
-
-def __run_test(script_path, test_input, test_output):
-    test_input_sanitized = test_input.replace('\\n', '\n')
-    test_output_sanitized = test_output.replace('\\n', '\n')
-    try:
-        result = subprocess.run(['python', script_path], input=test_input_sanitized, capture_output=True,
-                                encoding='utf-8', check=True)
-        is_output_correct = (test_output_sanitized == result.stdout.rstrip())
-        if is_output_correct:
-            return TestResult.OKAY
-        if __is_presentation_error(result.stdout, test_output_sanitized):
-            return TestResult.PRESENTATION_ERROR
-        return TestResult.WRONG_ANSWER
-    except subprocess.CalledProcessError as err:
-        return __evaluate_error(err.stderr)
+def __get_solution_max_length():
+    return Solution._meta.get_field('content').max_length
 
 
-def __is_presentation_error(actual_output, expected_output):
-    actual_output_stripped = "".join(actual_output.split())
-    expected_output_stripped = "".join(expected_output.split())
-    return actual_output_stripped == expected_output_stripped
+@authorized_user
+def ranking(request):
+    configuration = get_configuration()
+    ranking_time = __get_ranking_time(request)
+    if ranking_time is not None:
+        ranking_entries = get_historical_ranking_entries(configuration, ranking_time)
+    else:
+        is_frozen = __is_ranking_frozen(request.user, configuration)
+        ranking_entries = get_cached_ranking(configuration, is_frozen).ranking_entries
+    order = 'desc' if request.GET.get('order') == 'desc' else 'asc'
+    ordered_entries = __get_ordered_ranking_entries(ranking_entries, order)
+
+    paginator = Paginator(ordered_entries, settings.RANKING_PAGE_SIZE)
+    if 'my_team' in request.GET:
+        page_number = __get_team_page_number(ordered_entries, request.user.username, settings.RANKING_PAGE_SIZE)
+    else:
+        page_number = request.GET.get('page')
+    return render(request, 'competition/ranking.html',
+                  {'ranking_page': paginator.get_page(page_number), 'order': order, 'configuration': configuration,
+                   'ranking_time': ranking_time})
 
 
-def __evaluate_error(error_message):
-    if 'SyntaxError' in error_message:
-        return TestResult.COMPILATION_ERROR
-    return TestResult.RUNTIME_ERROR
+def __get_ranking_time(request):
+    # sedziowie moga zobaczyc ranking z dowolnej godziny dnia zawodow (?time=14:30); godzina jest czasem zawodow,
+    # tak jak upload_time rozwiazan i ranking_visibility_change_time - zegar cofniety o przerwy w zawodach
+    # (__get_offseted_time). Przerwy nie sa zapisywane osobno, wiec godziny sciennej nie da sie dokladnie przeliczyc
+    if 'time' not in request.GET or not request.user_roles.has_group('judge'):
+        return None
+    try:
+        ranking_time = datetime.datetime.strptime(request.GET['time'], '%H:%M')
+    except ValueError:
+        return None
+    configuration = get_configuration()
+    return timezone.localtime(configuration.competition_start_time).replace(
+        hour=ranking_time.hour, minute=ranking_time.minute, second=0, microsecond=0)
 
 
-def __delete_solution_file(filepath):
-    if os.path.exists(filepath):
-        os.remove(filepath)
+def __get_ordered_ranking_entries(ranking_entries, order):
+    # pozycja w rankingu nie zalezy od kolejnosci wyswietlania
+    positioned_entries = [dict(entry, position=position) for position, entry in enumerate(ranking_entries, start=1)]
+    if order == 'desc':
+        positioned_entries.reverse()
+    return positioned_entries
 
 
-class TestResult(Enum):
-    OKAY = 1
-    WRONG_ANSWER = 2
-    PRESENTATION_ERROR = 3
-    COMPILATION_ERROR = 4
-    RUNTIME_ERROR = 5
-    TIME_EXCEEDED_ERROR = 6
+def __get_team_page_number(ordered_entries, team_username, page_size):
+    for index, entry in enumerate(ordered_entries):
+        if entry['team_username'] == team_username:
+            return index // page_size + 1
+    return 1
 
 
 @authorized_user
-def ranking(request):
-    ranking_entries = __get_ranking_entries(request.user)
-    return render(request, 'competition/ranking.html',
-                  {"teams": Team.objects.all(), 'ranking_entries': ranking_entries,
-                   'configuration': Configuration.objects.all()[0]})
-
-
-def __get_ranking_entries(user):
-    should_show_frozen_results = __is_user_team(user) and not __is_ranking_visible()
-    if should_show_frozen_results:
-        ranking_visibility_change_time = Configuration.objects.all()[0].ranking_visibility_change_time
-
-    def __get_ranking_entry(entry_team):
-        team_solutions = Solution.objects.all().filter(team=entry_team)
-        if should_show_frozen_results:
-            team_solutions = team_solutions.filter(upload_time__lte=ranking_visibility_change_time)
-        total_time, correct_solutions_count = __calculate_total_time(team_solutions)
-        return {'team': entry_team, 'correct_solutions': correct_solutions_count, 'time': total_time,
-                'formatted_time': __format_time(total_time)}
-
-    ranking_entries = [__get_ranking_entry(team) for team in Team.objects.all()]
-    ranking_entries.sort(key=lambda e: (-e['correct_solutions'], e['time']))
-    return ranking_entries
-
-
-def __calculate_total_time(team_solutions):
-    correct_solutions = team_solutions.filter(solution_status=Solution.SolutionStatus.CORRECT)
-    correct_solutions_count = correct_solutions.count()
-    incorrect_solutions_count = team_solutions.exclude(solution_status=Solution.SolutionStatus.CORRECT).exclude(
-        solution_status=Solution.SolutionStatus.NOT_EVALUATED).count()
-
-    if correct_solutions_count > 0:
-        base_time = correct_solutions.order_by('upload_time').last().upload_time
-        difference_in_seconds = (base_time - __get_competition_start_time()).seconds
-        final_time = __calculate_time(difference_in_seconds, incorrect_solutions_count)
+def ranking_api(request):
+    configuration = get_configuration()
+    is_frozen = __is_ranking_frozen(request.user, configuration)
+    cached_ranking = get_cached_ranking(configuration, is_frozen)
+    try:
+        offset, limit = __get_page_parameters(request.GET, len(cached_ranking.ranking_entries))
+    except ValueError:
+        return HttpResponseBadRequest()
+
+    # klienci odpytujacy ranking co kilka sekund dostaja pelna odpowiedz tylko po zmianie wynikow
+    etag = quote_etag('{}-{}-{}-{}'.format(cached_ranking.version.hex, int(is_frozen), offset, limit))
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
     else:
-        final_time = __calculate_time(0, incorrect_solutions_count)
-    return final_time, correct_solutions_count
-
-
-def __get_competition_start_time():
-    return Configuration.objects.all()[0].competition_start_time
+        page_entries = cached_ranking.ranking_entries[offset:offset + limit]
+        response = JsonResponse({
+            'is_frozen': is_frozen,
+            'teams_count': len(cached_ranking.ranking_entries),
+            'offset': offset,
+            'ranking_entries': [dict(entry, position=position)
+                                for position, entry in enumerate(page_entries, start=offset + 1)],
+        })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
 
 
-def __calculate_time(difference_in_seconds, incorrect_solutions_count):
-    incorrect_solution_penalty = 1200  # 20 minut = 1200 sekund
-    return difference_in_seconds + (incorrect_solutions_count * incorrect_solution_penalty)
+def __get_page_parameters(query, entries_count):
+    offset = int(query.get('offset', 0))
+    limit = int(query.get('limit', entries_count))
+    if offset < 0 or limit < 0:
+        raise ValueError
+    return offset, limit
 
 
-def __format_time(time):
-    hours = time // 3600
-    minutes = time // 60 % 60
-    return "{}:{:02d}".format(hours, minutes)
+def __is_ranking_frozen(user, configuration):
+    return __is_user_team(user) and configuration.ranking_visibility != Configuration.RankingVisibility.VISIBLE
 
 
 def __is_user_team(user):
-    return user.groups.filter(name='team').exists()
-
-
-def __is_ranking_visible():
-    visibility = Configuration.objects.all()[0].ranking_visibility
-    return visibility == Configuration.RankingVisibility.VISIBLE
+    return get_user_roles(user).has_group('team')
 
 
 def home(request):
@@ -265,8 +242,8 @@ def home(request):
         return redirect('send-solution', task_id)
     else:
         context = {}
-        if __is_user_team(request.user):
-            team = Team.objects.all().filter(team_as_user=request.user).first()
+        if request.user_roles.has_group('team'):
+            team = request.user_roles.team
             team_tasks, are_all_tasks_finished = __get_team_tasks(team)
             context['tasks'] = team_tasks
             context['are_all_tasks_finished'] = are_all_tasks_finished
@@ -275,13 +252,12 @@ def home(request):
 
 
 def __get_team_tasks(team):
-    all_tasks = Task.objects.all()
-    finished_tasks = Solution.objects.all().filter(team=team).filter(
-        solution_status=Solution.SolutionStatus.CORRECT).values_list('task', flat=True)
+    all_tasks = get_tasks()
+    solved_tasks = get_solved_tasks(team.id) if team is not None else 0
     tasks_with_statuses = []
     are_all_finished = True
     for task in all_tasks:
-        is_finished = task.id in finished_tasks
+        is_finished = is_task_solved(solved_tasks, task.id)
         if not is_finished:
             are_all_finished = False
         tasks_with_statuses.append({'task': task, 'is_finished': is_finished})
@@ -289,4 +265,4 @@ def __get_team_tasks(team):
 
 
 def __is_competition_started():
-    return Configuration.objects.all()[0].competition_start_time is not None
+    return get_configuration().competition_start_time is not None
@@ -0,0 +1,34 @@
+# Przygotowanie pamieci podrecznych przed startem zawodow. Po rozpoczeciu zawodow wszystkie zespoly naraz otwieraja
+# strone glowna i wysylaja pierwsze rozwiazania - dzieki temu nie trafiaja jednoczesnie do pustych pamieci podrecznych.
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .configuration import get_configuration, get_tasks
+from .judge import get_task_tests
+from .models import Configuration, Task
+from .scoreboard import get_cached_ranking
+
+
+def warm_up():
+    # konfiguracja i zadania trafiaja do pamieci podrecznej Django - dla wszystkich procesow tylko wtedy, gdy jest ona
+    # wspolna (is_cache_shared), ranking - do pamieci tego procesu, a zamrozony ranking (RankingSnapshot) - do bazy;
+    # testy wczytuje proces oceniajacy (warm_up_judge)
+    configuration = get_configuration()
+    tasks_count = len(get_tasks())
+    get_cached_ranking(configuration, False)
+    if configuration.ranking_visibility != Configuration.RankingVisibility.VISIBLE:
+        get_cached_ranking(configuration, True)
+    return tasks_count
+
+
+def is_cache_shared():
+    # domyslna pamiec lokalna (i atrapa) jest osobna w kazdym procesie serwera i w procesie oceniajacym
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def warm_up_judge():
+    # wywolywane przez runjudge przy starcie i po kazdym rozpoczeciu (wznowieniu) zawodow - testy trafiaja do pamieci
+    # procesu oceniajacego, wiec wczytywanie ich w procesie serwera niczego by nie przyspieszylo
+    for task in Task.objects.all():
+        get_task_tests(task)
@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from competition.events import RANKING_EVENTS_PATH, ranking_events  # noqa: E402 - wymaga skonfigurowanego Django
+
+
+async def application(scope, receive, send):
+    # strumien zmian rankingu trzyma polaczenie otwarte, wiec jest obslugiwany poza widokami Django
+    if scope['type'] == 'http' and scope['path'] == RANKING_EVENTS_PATH:
+        await ranking_events(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -49,6 +49,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'competition.middleware.UserRolesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -121,3 +122,54 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.1/howto/static-files/
 
 STATIC_URL = '/static/'
+
+# Judge
+# Zgloszone rozwiazania sa oceniane przez osobny proces: python manage.py runjudge
+
+# co ile sekund proces oceniajacy sprawdza kolejke, gdy jest pusta
+JUDGE_POLL_INTERVAL = 1
+
+# po tylu sekundach zadanie zajete przez proces, ktory przestal dzialac, wraca do kolejki
+JUDGE_CLAIM_TIMEOUT = 300
+
+JUDGE_CLAIM_BATCH_SIZE = 10
+
+# po tylu nieudanych probach oceny (wyjatek w procesie oceniajacym) rozwiazanie dostaje werdykt RUNTIME_ERROR
+JUDGE_MAX_ATTEMPTS = 3
+
+# ile testow jednego rozwiazania moze byc uruchomionych jednoczesnie (1 - testy uruchamiane po kolei)
+JUDGE_TEST_WORKERS = os.cpu_count() or 1
+
+# maksymalny rozmiar wyjscia rozwiazania w bajtach - po jego przekroczeniu rozwiazanie jest przerywane
+JUDGE_OUTPUT_LIMIT = 64 * 1024 * 1024
+
+# Configuration
+# konfiguracja i lista zadan sa przechowywane w pamieci podrecznej Django (CACHES) najwyzej przez tyle sekund;
+# konfiguracja jest dodatkowo sprawdzana z wersja wynikow, a zmiany zadan moga byc widoczne w innych procesach
+# (np. runjudge) dopiero po tym czasie
+CONFIGURATION_CACHE_TIMEOUT = 10
+
+# pliki z duzymi danymi testowymi (Test.input_file, Test.output_file)
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Ranking
+# przez tyle sekund procesy moga pokazywac zapamietany ranking bez sprawdzania, czy pojawily sie nowe werdykty
+# (0 - wersja wynikow sprawdzana jest przy kazdym zapytaniu)
+RANKING_CACHE_MAX_STALENESS = 0
+
+# co ile sekund (wedlug czasu wyslania rozwiazan) zapisywany jest stan wynikow, od ktorego zaczyna sie odtwarzanie
+# rankingu z dowolnej chwili
+RANKING_CHECKPOINT_INTERVAL = 600
+
+# liczba zespolow na jednej stronie rankingu
+RANKING_PAGE_SIZE = 50
+
+# zmiany rankingu wysylane przez /ranking/events/ (tylko przez ASGI, np. uvicorn project.asgi:application)
+RANKING_EVENTS_POLL_INTERVAL = 1
+RANKING_EVENTS_KEEPALIVE_INTERVAL = 15
+
+# katalog, do ktorego po kazdej zmianie wynikow zapisywany jest publiczny ranking (ranking.html, ranking.json),
+# serwowany bez Django przez serwer plikow, np. BASE_DIR / 'ranking_export' (None - eksport wylaczony);
+# przy DEBUG pliki sa dostepne pod RANKING_EXPORT_URL
+RANKING_EXPORT_DIR = None
+RANKING_EXPORT_URL = '/public-ranking/'
@@ -4,7 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth.views import LogoutView
 
-from competition.views import configpanel, ranking, send_solution, home
+from competition.views import configpanel, ranking, ranking_api, send_solution, home, check_solution_status
 from users.views import register, no_team_slots_available, login_page
 
 urlpatterns = [
@@ -14,7 +14,12 @@ urlpatterns = [
     path('register/', register, name='registration'),
     path('register/limit', no_team_slots_available, name='register-no-team-slots-available'),
     path('solution/<int:task_id>/', send_solution, name='send-solution'),
+    path('solution/status/<int:solution_id>/', check_solution_status, name='solution-status'),
     path('ranking/', ranking, name='ranking'),
+    path('ranking/api/', ranking_api, name='ranking-api'),
     path('login/', login_page, name='login'),
     path('logout/', LogoutView.as_view(template_name='users/logout.html'), name='logout'),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+
+if settings.RANKING_EXPORT_DIR is not None:
+    urlpatterns += static(settings.RANKING_EXPORT_URL, document_root=settings.RANKING_EXPORT_DIR)
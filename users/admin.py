@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Team, Participant
+from .models import Team, Participant, CityUsernameCounter
 
 admin.site.register(Team)
-admin.site.register(Participant)
\ No newline at end of file
+admin.site.register(Participant)
+admin.site.register(CityUsernameCounter)
\ No newline at end of file
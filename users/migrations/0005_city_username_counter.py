@@ -0,0 +1,37 @@
+# Generated by Django 3.1.14 on 2026-10-18 13:54
+
+import re
+
+from django.db import migrations, models
+
+
+def create_city_username_counters(apps, schema_editor):
+    Team = apps.get_model('users', 'Team')
+    CityUsernameCounter = apps.get_model('users', 'CityUsernameCounter')
+    last_indexes = {}
+    for username in Team.objects.values_list('team_as_user__username', flat=True):
+        username_match = re.fullmatch(r'(\D*)(\d+)', username)
+        if username_match is not None:
+            city, index = username_match.group(1), int(username_match.group(2))
+            last_indexes[city] = max(last_indexes.get(city, 0), index)
+    CityUsernameCounter.objects.bulk_create(CityUsernameCounter(city=city, last_index=last_index)
+                                            for city, last_index in last_indexes.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_auto_20210130_1119'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityUsernameCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100, unique=True)),
+                ('last_index', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_city_username_counters, migrations.RunPython.noop),
+    ]
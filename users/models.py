@@ -25,3 +25,9 @@ class Participant(models.Model):
         MaxValueValidator(99, "Wiek musi być pomiędzy 14 a 99")
     ])
     team = models.ForeignKey(Team, on_delete=models.CASCADE, verbose_name="Zespół")
+
+
+class CityUsernameCounter(models.Model):
+    # ostatni numer nadany w loginie zespolu z danego miasta (<miasto><numer>)
+    city = models.CharField(max_length=100, unique=True)
+    last_index = models.PositiveIntegerField(default=0)
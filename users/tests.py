@@ -1,3 +1,42 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from users.models import CityUsernameCounter
+from users.views import __create_team_user as create_team_user
+
+
+def generate_username(team_city):
+    return create_team_user(team_city, '123456789').username
+
+
+class TestGenerateUsername(TestCase):
+    def test_consecutive_usernames(self):
+        self.assertEqual('kalisz1', generate_username('Kalisz'))
+        self.assertEqual('kalisz2', generate_username('Kalisz'))
+        self.assertEqual('lodz1', generate_username('Łódź'))
+
+    def test_counter_starts_after_existing_usernames(self):
+        User.objects.create_user(username='kalisz1', password='123456789')
+        User.objects.create_user(username='kalisz7', password='123456789')
+
+        self.assertEqual('kalisz8', generate_username('Kalisz'))
+
+    def test_username_taken_after_counter_was_created(self):
+        self.assertEqual('kalisz1', generate_username('Kalisz'))
+        User.objects.create_user(username='kalisz2', password='123456789')
+
+        self.assertEqual('kalisz3', generate_username('Kalisz'))
+        self.assertEqual('kalisz4', generate_username('Kalisz'))
+
+    def test_team_user_can_log_in(self):
+        team_user = create_team_user('Kalisz', 'haslo12345')
+
+        self.assertTrue(User.objects.get(id=team_user.id).check_password('haslo12345'))
+
+    def test_constant_number_of_queries(self):
+        for _ in range(5):
+            generate_username('Kalisz')
+
+        with self.assertNumQueries(5):  # razem z punktem zapisu transakcji
+            self.assertEqual('kalisz6', generate_username('Kalisz'))
+        self.assertEqual(6, CityUsernameCounter.objects.get(city='kalisz').last_index)
@@ -1,10 +1,14 @@
+import re
+
 from django.shortcuts import render, redirect
 from django.contrib.auth.models import User, Group
 from django.contrib.auth import authenticate, login
+from django.db import transaction, IntegrityError
+from django.db.models import F
 
 from .forms import TeamForm, ParticipantForm
-from .models import Participant, Team
-from competition.models import Configuration
+from .models import Participant, Team, CityUsernameCounter
+from competition.configuration import get_configuration
 from .decorators import unauthenticated_user
 
 
@@ -77,15 +81,13 @@ def __are_forms_valid(team_form, participant_forms, team_members):
 
 
 def __is_any_team_slot_available():
-    limit = Configuration.objects.all()[0].participants_limit
+    limit = get_configuration().participants_limit
     teams_total = Team.objects.all().count()
     return teams_total < limit
 
 
 def __save_team(team_form):
-    team_city = team_form.cleaned_data['school_city']
-    team_user = User.objects.create_user(
-        username=__generate_username(team_city), password=team_form.cleaned_data['password'])
+    team_user = __create_team_user(team_form.cleaned_data['school_city'], team_form.cleaned_data['password'])
     team = team_form.save(commit=False)
     group = Group.objects.get(name="team")
     team_user.groups.add(group)
@@ -94,24 +96,47 @@ def __save_team(team_form):
     return team
 
 
-def __generate_username(team_city):
+def __create_team_user(team_city, password):
     team_city_formatted = __sanitize_team_city(team_city)
-    index = 1
-    is_username_free = False
-    username = None
-    while not is_username_free:
-        username = "{}{}".format(team_city_formatted, index)
-        is_username_free = __is_username_free(username)
-        index = index + 1
-    return username
+    team_user = User()
+    team_user.set_password(password)  # haszowanie hasla trwa dlugo, wiec odbywa sie przed zablokowaniem licznika
+    while True:
+        try:
+            # numer jest zajmowany w tej samej transakcji, w ktorej powstaje uzytkownik
+            with transaction.atomic():
+                team_user.username = "{}{}".format(team_city_formatted, __allocate_city_index(team_city_formatted))
+                team_user.save()
+                return team_user
+        except IntegrityError:
+            # login zajety przez uzytkownika utworzonego z pominieciem licznika (np. w panelu administracyjnym) -
+            # licznik przesuwamy za najwyzszy uzyty numer i probujemy ponownie
+            last_used_index = __get_last_used_index(team_city_formatted)
+            CityUsernameCounter.objects.filter(city=team_city_formatted, last_index__lt=last_used_index).update(
+                last_index=last_used_index)
+
+
+def __allocate_city_index(city):
+    # wywolywane w transakcji - zwiekszenie licznika blokuje jego wiersz do jej konca, wiec rownolegle rejestracje
+    # dostaja rozne numery
+    is_updated = CityUsernameCounter.objects.filter(city=city).update(last_index=F('last_index') + 1)
+    if not is_updated:
+        try:
+            with transaction.atomic():
+                CityUsernameCounter.objects.create(city=city, last_index=__get_last_used_index(city) + 1)
+        except IntegrityError:  # licznik zostal utworzony w miedzyczasie przez inna rejestracje
+            CityUsernameCounter.objects.filter(city=city).update(last_index=F('last_index') + 1)
+    return CityUsernameCounter.objects.get(city=city).last_index
 
 
 def __sanitize_team_city(team_city):
     return "".join(filter(str.isalpha, team_city)).lower().replace('ł', 'l').replace('ś', 's').replace('ó', 'o').replace('ż', 'z').replace('ź', 'z').replace('ę', 'e').replace('ą', 'a').replace('ć', 'c')
 
 
-def __is_username_free(username):
-    return not User.objects.filter(username__exact=username).exists()
+def __get_last_used_index(city):
+    # licznik miasta zaczyna od numerow nadanych wczesniej (np. zespolom dodanym recznie)
+    usernames = User.objects.filter(username__regex=r'^{}[0-9]+$'.format(re.escape(city))).values_list(
+        'username', flat=True)
+    return max((int(username[len(city):]) for username in usernames), default=0)
 
 
 def __save_participants(participant_forms, team_members, team):